@@ -17,6 +17,7 @@ from . import (
     style,
 )
 from .tools import clon, enter
+from .tools.rename import renamer
 
 
 def configure(window) -> None:
@@ -48,3 +49,5 @@ def configure(window) -> None:
     bind_snapper.setup(window)
 
     command_list.setup(window)
+
+    renamer.recover_interrupted()
@@ -7,6 +7,7 @@ from . import style
 from .tools import (
     archiver,
     bookmark,
+    change_dir,
     clipboard,
     clon,
     compare,
@@ -25,6 +26,7 @@ from .tools.rename import insert as rename_insert
 from .tools.rename import photo as rename_photo
 from .tools.rename import pseudo_voising as rename_pseudo_voicing
 from .tools.rename import regexp as rename_regexp
+from .tools.rename import renamer
 from .tools.rename import stem as rename_stem
 from .tools.rename import substr as rename_substr
 
@@ -33,6 +35,7 @@ def setup(window) -> None:
 
     archiver.setup(window)
     bookmark.setup(window)
+    change_dir.setup(window)
     clipboard.setup(window)
     clon.setup(window)
     compare.setup(window)
@@ -51,11 +54,15 @@ def setup(window) -> None:
     rename_regexp.setup(window)
     rename_stem.setup(window)
     rename_substr.setup(window)
+    renamer.setup(window)
     selector.setup(window)
     style.setup(window)
 
     mapping = {
-        "SummarizeForLLM": misc.make_summary_for_llm_on_other_pane,
+        "SummarizeForLLM": lambda: misc.make_summary_for_llm_on_other_pane(),
+        "SummarizeForLLMGitignored": lambda: misc.make_summary_for_llm_on_other_pane(
+            gitignore=True
+        ),
         "GitInit": misc.git_init,
         "ChangeImageType": image_magick.change_image_type,
         "MakeShortcut": linker.make_shortcut,
@@ -73,7 +80,8 @@ def setup(window) -> None:
         "UnzipSelections": archiver.extract,
         "HideUnselectedItems": item_filter.hide_unselected,
         "ClearFilter": item_filter.clear_filter,
-        "CopyDirTree": clipboard.copy_dir_tree,
+        "CopyDirTree": lambda: clipboard.copy_dir_tree(),
+        "CopyDirTreeGitignored": lambda: clipboard.copy_dir_tree(gitignore=True),
         "Diffinity": lambda: compare.diff_files(with_diffinity=True),
         "DiffWithVSCode": lambda: compare.diff_files(with_diffinity=False),
         "MakeInternetShortcut": lambda: linker.make_internet_shortcut(
@@ -86,12 +94,16 @@ def setup(window) -> None:
         "RenameRegExp": rename_regexp.execute,
         "RenameStem": rename_stem.execute,
         "RenameSubstr": rename_substr.execute,
+        "UndoLastRename": renamer.undo_last,
         "FindSameFile": compare.FileHashDiff(2).compare,
-        "FromOtherNames": selector.from_other_names,
-        "FromActiveNames": selector.from_active_names,
+        "ListLatestUnderTree": lambda: change_dir.list_latest_under_tree(),
+        "FromOtherNames": lambda: selector.from_other_names(),
+        "FromActiveNames": lambda: selector.from_active_names(),
         "SelectSameName": selector.select_same_name,
-        "SelectNameUnique": selector.select_name_unique,
-        "SelectNameCommon": selector.select_name_common,
+        "SelectNameUnique": lambda: selector.select_name_unique(),
+        "SelectNameCommon": lambda: selector.select_name_common(),
+        "SelectNameUniqueLoose": lambda: selector.select_name_unique(True, "NFC"),
+        "SelectNameCommonLoose": lambda: selector.select_name_common(True, "NFC"),
         "SelectStemMatchCase": lambda: selector.select_regexp(True),
         "SelectStemMatch": lambda: selector.select_regexp(False),
         "SelectStemStartsWith": selector.select_stem_startswith,
@@ -1,4 +1,10 @@
+from __future__ import annotations
+
+import bisect
+import functools
 import os
+import re
+import threading
 import time
 
 import ckit  # type: ignore
@@ -10,15 +16,15 @@ from .tools.protocols import ItemDefaultProtocol
 
 
 class ItemTimestamp:
-    def __init__(self, item) -> None:
+    def __init__(self, item, today: tuple[int, int, int]) -> None:
         self._time = item.time()
-        self._now = time.localtime()
+        self._today = today
 
     @property
     def date(self) -> str:
         t = self._time
-        if t[0] == self._now[0]:
-            if t[1] == self._now[1] and t[2] == self._now[2]:
+        if t[0] == self._today[0]:
+            if t[1] == self._today[1] and t[2] == self._today[2]:
                 return ""
             return f"{t[1]:02}-{t[2]:02}"
         return f"{t[0]}-{t[1]:02}-{t[2]:02}"
@@ -29,67 +35,170 @@ class ItemTimestamp:
         return f"{t[3]:02}:{t[4]:02}:{t[5]:02}"
 
 
+class RowCache:
+    """
+    Formatted rows keyed by everything they depend on, with LRU eviction.
+    "Today" is looked up once per second instead of once per row, and is part of
+    the key, so rows re-render on their own when the date changes.
+    """
+
+    max_rows = 4096
+
+    def __init__(self) -> None:
+        self._rows: dict[tuple, str] = {}
+        self._clock = -1
+        self._today = (0, 0, 0)
+
+    def today(self) -> tuple[int, int, int]:
+        now = int(time.time())
+        if now != self._clock:
+            self._clock = now
+            self._today = time.localtime(now)[:3]
+        return self._today
+
+    def get(self, key: tuple) -> str | None:
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._rows[key] = row
+        return row
+
+    def put(self, key: tuple, row: str) -> None:
+        self._rows[key] = row
+        while self.max_rows < len(self._rows):
+            self._rows.pop(next(iter(self._rows)))
+
+    def clear(self) -> None:
+        self._rows.clear()
+        fit_width.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def fit_width(window: MainWindow, s: str, width: int, ellipsis: int) -> str:
+    return ckit.adjustStringWidth(window, s, width, ckit.ALIGN_LEFT, ellipsis)
+
+
+ROW_CACHE = RowCache()
+
+
 def itemformat_NativeName_Ext_Size_YYYYMMDDorHHMMSS(
     window: MainWindow, item: ItemDefaultProtocol, pane_width: int, _
 ) -> str:
-    timestamp = ItemTimestamp(item)
+    today = ROW_CACHE.today()
+    name = item.getName()
+    is_dir = item.isdir()
+    size = 0 if is_dir else item.size()
+    key = (name, is_dir, size, item.time(), pane_width, today)
+    row = ROW_CACHE.get(key)
+    if row is not None:
+        return row
+
+    timestamp = ItemTimestamp(item, today)
     date_elem = timestamp.date.rjust(ColWidth.date)
     time_elem = timestamp.time.rjust(ColWidth.time)
-    size_elem = (
-        "\ud83d\udcc1"
-        if item.isdir()
-        else getFileSizeString(item.size()).rjust(ColWidth.size)
-    )
+    size_elem = "\ud83d\udcc1" if is_dir else getFileSizeString(size).rjust(ColWidth.size)
 
     meta_elem = size_elem + date_elem + time_elem
     area_width = max(ColWidth.area_min, pane_width)
     filename_width = area_width - len(meta_elem)
 
-    stem, ext = (
-        [item.getName(), None]
-        if item.isdir()
-        else ckit.splitExt(item.getName(), ColWidth.ext)
-    )
+    stem, ext = [name, None] if is_dir else ckit.splitExt(name, ColWidth.ext)
 
     if ext:
         stem_width = filename_width - ColWidth.ext
-        return (
-            ckit.adjustStringWidth(
-                window, stem, stem_width, ckit.ALIGN_LEFT, ckit.ELLIPSIS_RIGHT
-            )
-            + ckit.adjustStringWidth(
-                window, ext, ColWidth.ext, ckit.ALIGN_LEFT, ckit.ELLIPSIS_NONE
-            )
+        row = (
+            fit_width(window, stem, stem_width, ckit.ELLIPSIS_RIGHT)
+            + fit_width(window, ext, ColWidth.ext, ckit.ELLIPSIS_NONE)
             + meta_elem
         )
-    return (
-        ckit.adjustStringWidth(
-            window, stem, filename_width, ckit.ALIGN_LEFT, ckit.ELLIPSIS_RIGHT
-        )
-        + meta_elem
-    )
+    else:
+        row = fit_width(window, stem, filename_width, ckit.ELLIPSIS_RIGHT) + meta_elem
+    ROW_CACHE.put(key, row)
+    return row
+
+
+NUMBER_SPLIT = re.compile(r"(\d+)")
 
 
 class sorter_UnderscoreFirst:
-    def __init__(self, order: int = 1) -> None:
+    """
+    Sort keys are computed once per (name, isdir) and kept across refreshes.
+    The last few sorted key lists are remembered too: when a listing differs from
+    one of them by only a few entries, those are merged in instead of re-sorting.
+    With `natural=True`, digit runs compare as numbers ("file2" < "file10").
+    """
+
+    max_keys = 65536
+    max_history = 4
+
+    def __init__(self, order: int = 1, natural: bool = False) -> None:
         self.order = order
+        self.natural = natural
+        self._lock = threading.Lock()
+        self._keys: dict[tuple[str, bool], tuple] = {}
+        self._history: list[tuple[list[tuple], set[tuple]]] = []
 
-    def __call__(self, items) -> None:
-        def _sort_key(item) -> tuple:
-            dir_upper_flag = not item.isdir() if self.order == 1 else item.isdir()
-            name = item.getName()
+    def _stem_key(self, stem: str) -> str | tuple:
+        s = stem.lower()
+        if not self.natural:
+            return s
+        return tuple(int(c) if i % 2 else c for i, c in enumerate(NUMBER_SPLIT.split(s)))
+
+    def _sort_key(self, name: str, is_dir: bool) -> tuple:
+        key = self._keys.get((name, is_dir))
+        if key is None:
+            if self.max_keys < len(self._keys):
+                self._keys.clear()
+            dir_upper_flag = not is_dir if self.order == 1 else is_dir
             stem, ext = os.path.splitext(name)
             underscore_count = len(name) - len(name.lstrip("_"))
-            return (
+            key = (
                 dir_upper_flag,
                 not name.startswith("."),
                 not name.startswith("_"),
                 (-1 * underscore_count),
-                stem.lower(),
+                self._stem_key(stem),
                 ext.lower(),
+                name,
             )
+            self._keys[(name, is_dir)] = key
+        return key
 
-        items.sort(key=_sort_key, reverse=self.order == -1)
+    def _merge(self, keys: set[tuple]) -> list[tuple] | None:
+        limit = max(8, len(keys) // 32)
+        for i, (prev, prev_set) in enumerate(self._history):
+            removed = prev_set - keys
+            added = keys - prev_set
+            if limit < len(removed) + len(added):
+                continue
+            del self._history[i]
+            merged = [k for k in prev if k in keys] if removed else list(prev)
+            for k in added:
+                bisect.insort(merged, k)
+            return merged
+        return None
+
+    def _remember(self, ordered: list[tuple], keys: set[tuple]) -> None:
+        self._history.insert(0, (ordered, keys))
+        del self._history[self.max_history :]
+
+    def __call__(self, items) -> None:
+        with self._lock:
+            by_key = {self._sort_key(item.getName(), item.isdir()): item for item in items}
+            if len(by_key) < len(items):
+                items.sort(
+                    key=lambda item: self._sort_key(item.getName(), item.isdir()),
+                    reverse=self.order == -1,
+                )
+                return
+            keys = set(by_key)
+            ordered = self._merge(keys)
+            if ordered is None:
+                ordered = sorted(keys)
+            self._remember(ordered, keys)
+        if self.order == -1:
+            items[:] = [by_key[k] for k in reversed(ordered)]
+        else:
+            items[:] = [by_key[k] for k in ordered]
 
 
 CUSTOM_THEME = {
@@ -120,6 +229,7 @@ CUSTOM_THEME = {
 
 
 def setup(window) -> None:
+    ROW_CACHE.clear()
     window.itemformat = itemformat_NativeName_Ext_Size_YYYYMMDDorHHMMSS
 
     name = "black"
@@ -142,6 +252,11 @@ def setup(window) -> None:
                 sorter_UnderscoreFirst(),
                 sorter_UnderscoreFirst(order=-1),
             ),
+            (
+                "N : Natural Underscore Order",
+                sorter_UnderscoreFirst(natural=True),
+                sorter_UnderscoreFirst(order=-1, natural=True),
+            ),
         ] + window.sorter_list
 
     sorter = window.sorter_list[0][1]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tarfile
+import threading
+import zipfile
+from typing import Callable, NamedTuple
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveEntry(NamedTuple):
+    name: str
+    size: int
+    is_dir: bool
+
+
+def zip_name(info: zipfile.ZipInfo) -> str:
+    """
+    Entries without the UTF-8 flag are usually cp932 here, not cp437.
+    Decoded from `orig_filename`: on Windows `filename` has had every `\\`
+    turned into `/`, which breaks cp932 characters whose second byte is 0x5C.
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        name = info.orig_filename.encode("cp437").decode("cp932")
+    except UnicodeError:
+        return info.filename
+    return name.replace("\\", "/")
+
+
+def list_zip(path: str) -> list[ArchiveEntry]:
+    # `ZipFile` reads the central directory only; payloads stay untouched
+    with zipfile.ZipFile(path) as zf:
+        return [
+            ArchiveEntry(zip_name(info), info.file_size, info.is_dir()) for info in zf.infolist()
+        ]
+
+
+def list_tar(path: str) -> list[ArchiveEntry]:
+    # plain tar seeks from header to header; compressed ones have to be inflated
+    with tarfile.open(path, "r:*") as tf:
+        return [ArchiveEntry(ti.name, ti.size, ti.isdir()) for ti in tf]
+
+
+def list_by_7zip(seven_zip: str, path: str) -> list[ArchiveEntry]:
+    proc = subprocess.run(
+        [seven_zip, "l", "-slt", "-sccUTF-8", path],
+        capture_output=True,
+        encoding="utf-8",
+        errors="replace",
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise OSError(proc.stderr.strip() or proc.stdout.strip())
+    entries = []
+    _, _, body = proc.stdout.partition("\n----------\n")
+    for block in body.split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition(" = ")
+            if sep:
+                fields[key] = value
+        if "Path" not in fields:
+            continue
+        attributes = fields.get("Attributes", "")
+        is_dir = fields.get("Folder") == "+" or attributes.startswith("D")
+        size = fields.get("Size", "")
+        entries.append(ArchiveEntry(fields["Path"], int(size) if size.isdigit() else 0, is_dir))
+    return entries
+
+
+class ArchiveNode:
+    __slots__ = ("name", "is_dir", "files", "size", "children")
+
+    def __init__(self, name: str, is_dir: bool) -> None:
+        self.name = name
+        self.is_dir = is_dir
+        self.files = 0
+        self.size = 0
+        self.children: dict[str, ArchiveNode] = {}
+
+    def sorted_children(self) -> list[ArchiveNode]:
+        return sorted(self.children.values(), key=lambda n: (not n.is_dir, n.name.lower()))
+
+
+def build_tree(entries: list[ArchiveEntry]) -> ArchiveNode:
+    """Entry tree whose directories carry the file count and size below them."""
+    root = ArchiveNode("", True)
+    for entry in entries:
+        parts = [p for p in entry.name.replace("\\", "/").split("/") if p]
+        if len(parts) < 1:
+            continue
+        node = root
+        ancestors = [root]
+        for i, part in enumerate(parts):
+            is_dir = entry.is_dir or i < len(parts) - 1
+            child = node.children.get(part)
+            if child is None:
+                child = ArchiveNode(part, is_dir)
+                node.children[part] = child
+            elif is_dir:
+                child.is_dir = True
+            node = child
+            ancestors.append(node)
+        if not entry.is_dir:
+            for a in ancestors:
+                a.files += 1
+                a.size += entry.size
+    return root
+
+
+def list_entries(path: str, fallback: Callable[[], list[ArchiveEntry]]) -> list[ArchiveEntry]:
+    """
+    Index of `path` read without extracting anything: zip and tar in-process,
+    other formats through `7z l`, and `fallback` when 7-Zip is not available.
+    """
+    if zipfile.is_zipfile(path):
+        return list_zip(path)
+    if path.lower().endswith(TAR_SUFFIXES):
+        return list_tar(path)
+    seven_zip = shutil.which("7z")
+    if seven_zip is not None:
+        return list_by_7zip(seven_zip, path)
+    return fallback()
+
+
+class ArchiveIndex:
+    """Entry trees of archives cached by (path, size, mtime)."""
+
+    max_entries = 8
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._trees: dict[tuple[str, int, int], ArchiveNode] = {}
+
+    def get(self, path: str, fallback: Callable[[], list[ArchiveEntry]]) -> ArchiveNode:
+        st = os.stat(path)
+        key = (path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            found = self._trees.pop(key, None)
+            if found is not None:
+                self._trees[key] = found
+                return found
+        tree = build_tree(list_entries(path, fallback))
+        with self._lock:
+            self._trees[key] = tree
+            while self.max_entries < len(self._trees):
+                self._trees.pop(next(iter(self._trees)))
+        return tree
+
+
+ARCHIVE_INDEX = ArchiveIndex()
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import configparser
 import os
+import re
 import shutil
 import subprocess
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable
 
 import ckit  # type: ignore
-from cfiler_resultwindow import popResultWindow  # type: ignore
+from cfiler_misc import getFileSizeString  # type: ignore
 
-from . import cpane, kiritori
+from . import cpane, kiritori, listwindow
+from .archive_index import ARCHIVE_INDEX, ArchiveEntry, ArchiveNode, zip_name
 from .common import get_now, stringify
+from .zip_writer import collect_members, write_zip
+
+INI_SECTION = "ZIP_CONFIG"
+INI_OPTION_LEVEL = "level"
+INI_OPTION_WORKERS = "workers"
 
 
 def setup(_window) -> None:
@@ -18,6 +31,12 @@ def setup(_window) -> None:
 
     kiritori.setup(window)
     cpane.setup(window)
+    listwindow.setup(window)
+
+    try:
+        window.ini.add_section(INI_SECTION)
+    except configparser.DuplicateSectionError:
+        pass
 
 
 def is_target(ext: str) -> bool:
@@ -28,31 +47,178 @@ def is_target(ext: str) -> bool:
     return False
 
 
+MAX_PEEK_ROWS = 2000
+
+
+def describe(node: ArchiveNode) -> str:
+    if node.is_dir:
+        return f"{node.name}/  ({node.files} files, {getFileSizeString(node.size)})"
+    return f"{node.name}  ({getFileSizeString(node.size)})"
+
+
+def browse(title: str, root: ArchiveNode) -> None:
+    """
+    Show one directory level at a time, starting from the top-level summary.
+    Enter on a folder expands it, on `..` goes back; Esc closes.
+    """
+    stack = [root]
+    while True:
+        node = stack[-1]
+        children = node.sorted_children()
+        menu = [describe(c) for c in children[:MAX_PEEK_ROWS]]
+        if MAX_PEEK_ROWS < len(children):
+            menu.append(f"... ({len(children) - MAX_PEEK_ROWS} more)")
+        if 1 < len(stack):
+            children.insert(0, stack[-2])
+            menu.insert(0, "..")
+        path = "/".join([title] + [n.name for n in stack[1:]])
+        summary = f"{node.files} files, {getFileSizeString(node.size)}"
+        result, _ = listwindow.invoke(f"[Peek] {path} ({summary})", menu)
+        if result < 0:
+            return
+        if len(menu) - 1 <= result and MAX_PEEK_ROWS < len(node.children):
+            continue
+        picked = children[result]
+        if 1 < len(stack) and result == 0:
+            stack.pop()
+        elif picked.is_dir:
+            stack.append(picked)
+
+
 def peek(path: str) -> None:
     p = Path(path)
     archiver = window.getArchiver(p.name)
     if not archiver:
         return
 
-    def _peek(job_item: ckit.JobItem) -> None:
-        job_item.name = p.name
-        job_item.tree = []
-
+    def _open_archive() -> list[ArchiveEntry]:
+        entries = []
         arc = archiver.openArchive(window.getHWND(), path, 0)
         try:
             for info in arc.iterItems("*"):
-                job_item.tree.append(info[0])
+                name = info[0]
+                entries.append(ArchiveEntry(name, 0, name.endswith(("/", "\\"))))
         finally:
             arc.close()
+        return entries
+
+    def _peek(job_item: ckit.JobItem) -> None:
+        job_item.tree = None
+        try:
+            job_item.tree = ARCHIVE_INDEX.get(path, _open_archive)
+        except Exception as e:  # noqa: BLE001
+            kiritori.log(e)
 
     def _finished(job_item: ckit.JobItem) -> None:
-        lines = [t for t in job_item.tree]
-        popResultWindow(window, f"[Peek] {job_item.name}", "\n".join(lines))
+        if job_item.tree is not None:
+            browse(p.name, job_item.tree)
 
     job = ckit.JobItem(_peek, _finished)
     window.taskEnqueue(job, create_new_queue=False)
 
 
+EXTRACT_WORKERS = min(4, (os.cpu_count() or 2))
+SMALL_ZIP_BYTES = 32 * 1024 * 1024
+PROGRESS_STEP = 10
+PERCENT = re.compile(r"(\d+)%")
+
+
+def restore_mtime(target: str, date_time: tuple[int, int, int, int, int, int]) -> None:
+    try:
+        mtime = time.mktime(date_time + (0, 0, -1))
+        os.utime(target, (mtime, mtime))
+    except (OverflowError, ValueError, OSError):
+        pass
+
+
+def extract_small_zip(path: str, out: str) -> None:
+    """
+    Extract in-process; `ZipFile.extract` already strips `..` and drive parts.
+    Timestamps are restored as 7-Zip does, directories last since filling them
+    touches their mtime.
+    """
+    dirs = []
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            info.filename = zip_name(info)
+            target = zf.extract(info, out)
+            if info.is_dir():
+                dirs.append((target, info.date_time))
+            else:
+                restore_mtime(target, info.date_time)
+    for target, date_time in reversed(dirs):
+        restore_mtime(target, date_time)
+
+
+def run_7zip_extract(seven_zip: str, path: str, out: str, is_canceled: Callable[[], bool]) -> str:
+    """
+    Run `7z x`, printing its progress every `PROGRESS_STEP` percent.
+    Returns the error output, "" on success.
+    """
+    name = Path(path).name
+    proc = subprocess.Popen(
+        [seven_zip, "x", path, f"-o{out}", "-y", "-bso0", "-bsp1", "-bse1", "-sccUTF-8"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        creationflags=subprocess.CREATE_NO_WINDOW,
+    )
+    assert proc.stdout is not None
+    output = []
+    shown = -PROGRESS_STEP
+    tail = ""
+    while True:
+        chunk = proc.stdout.read1(4096)
+        if not chunk:
+            break
+        if is_canceled():
+            proc.kill()
+            break
+        output.append(chunk)
+        text = chunk.decode("utf-8", errors="replace")
+        for m in PERCENT.finditer(tail + text):
+            percent = int(m.group(1))
+            if shown + PROGRESS_STEP <= percent < 100:
+                print(f"  {name}: {percent}%")
+                shown = percent
+        tail = text[-4:]
+    proc.wait()
+    if is_canceled():
+        return "Canceled."
+    if proc.returncode != 0:
+        # drop the progress updates, which are separated by backspaces
+        parts = re.split(r"[\b\r\n]+", b"".join(output).decode("utf-8", errors="replace"))
+        return "\n".join(p.strip() for p in parts if p.strip() and not PERCENT.match(p.strip()))
+    return ""
+
+
+def extract_one(seven_zip: str, path: str, out: str, is_canceled: Callable[[], bool]) -> str:
+    if os.path.getsize(path) <= SMALL_ZIP_BYTES and zipfile.is_zipfile(path):
+        try:
+            extract_small_zip(path, out)
+            return ""
+        except (RuntimeError, NotImplementedError, zipfile.BadZipFile):
+            pass  # encrypted or unsupported method: leave it to 7-Zip
+    return run_7zip_extract(seven_zip, path, out, is_canceled)
+
+
+def output_dirs(dest: str, targets: list[str]) -> list[str]:
+    """`dest` itself for one archive, else one subfolder per archive stem."""
+    if len(targets) < 2:
+        return [dest]
+    taken: set[str] = set()
+    dirs = []
+    for target in targets:
+        stem = Path(target).stem
+        name = stem
+        i = 2
+        while name.lower() in taken:
+            name = f"{stem}_{i}"
+            i += 1
+        taken.add(name.lower())
+        dirs.append(os.path.join(dest, name))
+    return dirs
+
+
 def extract_with_7zip(dest: str, *paths: str) -> None:
     seven_zip = shutil.which("7z")
     if seven_zip is None:
@@ -62,38 +228,47 @@ def extract_with_7zip(dest: str, *paths: str) -> None:
     targets = [t for t in paths if Path(t).is_file() and is_target(Path(t).suffix)]
     if len(targets) < 1:
         return
+    jobs = list(zip(targets, output_dirs(dest, targets)))
 
-    def _extract(_) -> None:
+    def _extract(job_item: ckit.JobItem) -> None:
         kiritori.draw_header(f"Extracting as '{dest}'...")
+        job_item.failed = 0
+        count = 0
+        with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as pool:
+            queue = iter(jobs)
+            running: dict[Future, str] = {}
+            while True:
+                while len(running) < EXTRACT_WORKERS and not job_item.isCanceled():
+                    job = next(queue, None)
+                    if job is None:
+                        break
+                    target, out = job
+                    future = pool.submit(extract_one, seven_zip, target, out, job_item.isCanceled)
+                    running[future] = target
+                if len(running) < 1:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = Path(running.pop(future)).name
+                    count += 1
+                    try:
+                        error = future.result()
+                    except Exception as e:  # noqa: BLE001
+                        error = str(e)
+                    if error:
+                        job_item.failed += 1
+                        print(f"{name}: {error}")
+                    else:
+                        print(f"[{count:02}/{len(jobs):02}]{name}")
+        if job_item.isCanceled():
+            print("Canceled.")
 
-        for target in targets:
-            try:
-                cmd = [
-                    seven_zip,
-                    "x",
-                    target,
-                    f"-o{dest}",
-                    "-y",
-                ]
-                proc = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    check=False,
-                )
-                if proc.returncode != 0:
-                    if o := proc.stdout:
-                        kiritori.log(o)
-                    if e := proc.stderr:
-                        kiritori.log(e)
-            except Exception as e:  # noqa: BLE001
-                kiritori.log(e)
-                return
-
-    def _finished(_) -> None:
+    def _finished(job_item: ckit.JobItem) -> None:
         print("Finished")
-        kiritori.draw_footer()
+        note = f"{len(jobs)} archives"
+        if 0 < job_item.failed:
+            note += f", {job_item.failed} failed"
+        kiritori.draw_footer(note)
         pane = cpane.CPane()
         pane.refresh()
         pane.focusByName(Path(dest).name)
@@ -105,10 +280,11 @@ def extract_with_7zip(dest: str, *paths: str) -> None:
 def extract() -> None:
     pane = cpane.CPane()
 
-    for item in pane.selectedItems:
-        ext = Path(item.getFullpath()).suffix
-        if not is_target(ext):
-            pane.unSelectByName(item.getName())
+    pane.unSelectByNames(
+        item.getName()
+        for item in pane.selectedItems
+        if not is_target(Path(item.getFullpath()).suffix)
+    )
 
     if not pane.hasSelection:
         return
@@ -142,33 +318,89 @@ def extract() -> None:
         window.command_ExtractArchive(None)
 
 
-def compress_with_7zip(zip_path: str, *targets: str) -> None:
-    seven_zip = shutil.which("7z")
-    if seven_zip is None:
-        kiritori.log("7z not found.")
-        return
+def get_zip_level() -> int:
+    try:
+        return min(9, max(0, window.ini.getint(INI_SECTION, INI_OPTION_LEVEL)))
+    except Exception:  # noqa: BLE001
+        return 6
+
+
+def get_zip_workers() -> int:
+    try:
+        return max(1, window.ini.getint(INI_SECTION, INI_OPTION_WORKERS))
+    except Exception:  # noqa: BLE001
+        return max(1, (os.cpu_count() or 2) - 1)
+
+
+def compress_to_zip(zip_path: str, *targets: str) -> None:
+    root = os.path.dirname(zip_path)
+    level = get_zip_level()
+    workers = get_zip_workers()
+
+    def _compress(job_item: ckit.JobItem) -> None:
+        kiritori.draw_header(f"Compressing as '{Path(zip_path).name}'...")
+        window.setProgressValue(None)
+        job_item.note = ""
+        members = collect_members(root, list(targets))
+        total = 0
+        for m in members:
+            if not m.is_dir:
+                try:
+                    total += os.path.getsize(m.path)
+                except OSError:
+                    pass
+
+        lock = threading.Lock()
+        progress = {"done": 0, "percent": -PROGRESS_STEP}
+        started = time.perf_counter()
+
+        def _on_progress(n: int) -> None:
+            # deflate workers: only count here
+            with lock:
+                progress["done"] += n
+
+        def _on_tick() -> None:
+            # this job's own thread
+            if total < 1:
+                return
+            with lock:
+                done = progress["done"]
+            window.setProgressValue(min(1.0, done / total))
+            percent = done * 100 // total
+            if progress["percent"] + PROGRESS_STEP <= percent < 100:
+                progress["percent"] = percent
+                mbps = done / max(time.perf_counter() - started, 1e-6) / (1024 * 1024)
+                print(f"  {percent}%  {mbps:.1f} MB/s")
 
-    def _compress(_) -> None:
         try:
-            cmd = [seven_zip, "a", "-tzip", "-y", zip_path] + list(targets)
-            proc = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                check=False,
+            finished = write_zip(
+                zip_path, members, level, workers, job_item.isCanceled, _on_progress, _on_tick
             )
-            if proc.returncode != 0:
-                if o := proc.stdout:
-                    kiritori.log(o)
-                if e := proc.stderr:
-                    kiritori.log(e)
         except Exception as e:  # noqa: BLE001
-            kiritori.log(e)
+            print(e)
+            finished = False
+        if not finished:
+            try:
+                os.remove(zip_path)
+            except OSError:
+                pass
+            if job_item.isCanceled():
+                print("Canceled.")
             return
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        mbps = progress["done"] / elapsed / (1024 * 1024)
+        size = os.path.getsize(zip_path)
+        job_item.note = (
+            f"{len(members)} items, {mbps:.1f} MB/s, "
+            f"{total / (1024 * 1024):.1f} MB -> {size / (1024 * 1024):.1f} MB"
+        )
 
-    def _finished(_) -> None:
-        pass
+    def _finished(job_item: ckit.JobItem) -> None:
+        window.clearProgress()
+        kiritori.draw_footer(job_item.note)
+        pane = cpane.CPane()
+        pane.refresh()
+        pane.focusByName(Path(zip_path).name)
 
     job = ckit.JobItem(_compress, _finished)
     window.taskEnqueue(job, create_new_queue=False)
@@ -195,10 +427,4 @@ def compress() -> None:
         kiritori.log(f"'{result}' already exists.")
         return
 
-    zip_path = os.path.join(pane.currentPath, result)
-
-    if shutil.which("7z") is not None:
-        compress_with_7zip(zip_path, *targets)
-    else:
-        pane.adjustWidth()
-        window.command_CreateArchive(None)
+    compress_to_zip(os.path.join(pane.currentPath, result), *targets)
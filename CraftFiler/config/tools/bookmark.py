@@ -6,10 +6,8 @@ import shutil
 import subprocess
 from pathlib import Path
 
-import ckit  # type: ignore
-
-from . import cpane, kiritori
-from .common import check_fzf, open_vscode, smart_check_path, stringify
+from . import cpane, fuzzy, kiritori
+from .common import open_vscode, smart_check_path, stringify
 from .listwindow import ask_open_by_vscode
 
 
@@ -18,6 +16,7 @@ def setup(_window) -> None:
     window = _window
     kiritori.setup(window)
     cpane.setup(window)
+    fuzzy.setup(window)
 
 
 def okini(*params: str) -> None:
@@ -91,10 +90,6 @@ def bookmark_here() -> None:
 
 
 def fuzzy_bookmark(local_only: bool) -> None:
-    if not check_fzf():
-        kiritori.log("fzf not found.")
-        return
-
     if shutil.which("okini") is None:
         kiritori.log("okini not found.")
         return
@@ -109,52 +104,27 @@ def fuzzy_bookmark(local_only: bool) -> None:
         pref = pane.currentPath + os.sep
         bookmarks = [bm for bm in bookmarks if bm["path"].startswith(pref)]
 
-    def _select(job_item: ckit.JobItem) -> None:
-        job_item.bookmark_name = ""
+    name = fuzzy.pick("Bookmark", [bm["name"] for bm in bookmarks])
+    if name == "":
+        return
 
-        names = "\n".join([bm["name"] for bm in bookmarks])
-        if names == "":
-            return
-        cmd = [
-            "fzf.exe",
-            "--margin=1",
-            "--no-color",
-            "--input-border=sharp",
-            "--layout=reverse",
-        ]
-        proc = subprocess.run(
-            cmd, input=names, capture_output=True, encoding="utf-8", check=False
-        )
-        if proc.returncode != 0 and (e := proc.stderr):
-            kiritori.log(e)
-            return
-        job_item.bookmark_name = proc.stdout.strip()
+    path = None
+    for bm in bookmarks:
+        if bm["name"] == name:
+            path = bm["path"]
+            break
+    if path is None:
+        return
 
-    def _open(job_item: ckit.JobItem) -> None:
-        name = job_item.bookmark_name
-        if name == "":
+    if smart_check_path(os.path.join(path, ".git")):
+        v = ask_open_by_vscode()
+        if v is None:
             return
-
-        path = None
-        for bm in bookmarks:
-            if bm["name"] == name:
-                path = bm["path"]
-                break
-        if path is None:
+        if v:
+            open_vscode(path)
             return
 
-        if smart_check_path(os.path.join(path, ".git")):
-            v = ask_open_by_vscode()
-            if v is None:
-                return
-            if v:
-                open_vscode(path)
-                return
-
-        pane.openPath(path)
-
-    job = ckit.JobItem(_select, _open)
-    window.taskEnqueue(job, create_new_queue=False)
+    pane.openPath(path)
 
 
 def set_bookmark_alias() -> None:
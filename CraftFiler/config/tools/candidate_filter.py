@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable
+
+import ckit  # type: ignore
+
+
+def fold(s: str) -> str:
+    return s.lower()
+
+
+class PrefixFilter:
+    """
+    Case-insensitive prefix filter for `candidate_handler`s.
+    Candidates are normalized once. When the query extends the previous one,
+    only the previous hits are checked again.
+    Every call takes a new generation: a call overtaken by a newer one stops early
+    and returns None instead of publishing an out-of-date result; `current` then
+    falls back to the last completed result rather than an empty list.
+    """
+
+    check_every = 1024
+
+    def __init__(self, candidates: Iterable[str], normalize: Callable[[str], str] = fold) -> None:
+        self.candidates = list(candidates)
+        self.normalize = normalize
+        self._keys = [normalize(c) for c in self.candidates]
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._last_query: str | None = None
+        self._last_hits: list[int] = []
+        self._last_result: list[str] = self.candidates
+
+    def filter(self, query: str) -> list[str] | None:
+        q = self.normalize(query)
+        with self._lock:
+            self.generation += 1
+            gen = self.generation
+            if self._last_query is not None and q.startswith(self._last_query):
+                pool: Iterable[int] = self._last_hits
+            else:
+                pool = range(len(self.candidates))
+
+        hits = []
+        for n, i in enumerate(pool):
+            if n % self.check_every == 0 and gen != self.generation:
+                return None
+            if self._keys[i].startswith(q):
+                hits.append(i)
+
+        with self._lock:
+            if gen != self.generation:
+                return None
+            self._last_query = q
+            self._last_hits = hits
+            result = [self.candidates[i] for i in hits]
+            self._last_result = result
+        return result
+
+    def current(self, query: str) -> list[str]:
+        """Hits for `query`, or the last completed ones if a newer call overtook it."""
+        result = self.filter(query)
+        if result is None:
+            with self._lock:
+                result = self._last_result
+        return result
+
+    def handler(
+        self,
+    ) -> Callable[[ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]]:
+        def _handler(
+            update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
+        ) -> tuple[list[str], int]:
+            return self.current(update_info.text), 0
+
+        return _handler
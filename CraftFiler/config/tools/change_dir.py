@@ -3,19 +3,23 @@ from __future__ import annotations
 import os
 import shutil
 import subprocess
+import time
 from pathlib import Path
 
 import ckit  # type: ignore
 
-from . import cpane, kiritori, listwindow
+from . import cpane, fuzzy, kiritori, latest_index, listwindow
+from .candidate_filter import PrefixFilter
 from .common import (
     DESKTOP_PATH,
     CallbackFunc,
+    check_paths,
     delay,
     open_vscode,
     smart_check_path,
     stringify,
 )
+from .dir_listing import DIR_LISTINGS
 
 
 def setup(_window) -> None:
@@ -25,6 +29,7 @@ def setup(_window) -> None:
     kiritori.setup(window)
     listwindow.setup(window)
     cpane.setup(window)
+    fuzzy.setup(window)
 
 
 def open_latest_under_tree() -> None:
@@ -36,34 +41,60 @@ def open_latest_under_tree() -> None:
 
     def _scan(job_item: ckit.JobItem) -> None:
         kiritori.draw_header(f"Searching for newest file under '{root}' ...")
-        job_item.latest = None
-        for item in pane.traverse(True, "_obsolete"):
-            if job_item.latest is None:
-                job_item.latest = item
-                continue
-            if job_item.latest.time() <= item.time():
-                job_item.latest = item
+        index = latest_index.get_index(root, ["_obsolete"])
+        found = index.query(1, is_canceled=job_item.isCanceled)
+        job_item.latest = found[0][1] if found else None
+        job_item.relisted = index.relisted
 
     def _open(job_item: ckit.JobItem) -> None:
-        if job_item.latest:
-            p = job_item.latest.getFullpath()
-            pane.openPath(p)
-            rel = Path(p).relative_to(Path(root))
-            print(f"==> '{rel}'")
-        kiritori.draw_footer()
+        if job_item.isCanceled():
+            print("Canceled.")
+        elif job_item.latest:
+            pane.openPath(os.path.join(root, job_item.latest))
+            print(f"==> '{job_item.latest}'")
+        kiritori.draw_footer(f"re-listed {job_item.relisted} dirs")
 
     job = ckit.JobItem(_scan, _open)
     window.taskEnqueue(job, create_new_queue=False)
 
 
+def list_latest_under_tree(count: int = 30) -> None:
+    pane = cpane.CPane()
+    if pane.isBlank:
+        return
+
+    root = pane.currentPath
+
+    def _scan(job_item: ckit.JobItem) -> None:
+        index = latest_index.get_index(root, ["_obsolete"])
+        job_item.found = index.query(count, is_canceled=job_item.isCanceled)
+
+    def _list(job_item: ckit.JobItem) -> None:
+        if job_item.isCanceled() or len(job_item.found) < 1:
+            return
+        rels = [rel for _, rel in job_item.found]
+        menu = [
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime)) + "  " + rel
+            for mtime, rel in job_item.found
+        ]
+        result, _ = listwindow.invoke(f"Latest {len(menu)} under '{Path(root).name}'", menu)
+        if result < 0:
+            return
+        pane.openPath(os.path.join(root, rels[result]))
+
+    job = ckit.JobItem(_scan, _list)
+    window.taskEnqueue(job, create_new_queue=False)
+
+
 class zyw:
     exe_name = "zyw.exe"
 
     @staticmethod
     def get_root(src: str) -> str:
-        for path in Path(src).parents:
-            p = os.path.join(path, ".root")
-            if smart_check_path(p, 0.5):
+        parents = list(Path(src).parents)
+        found = check_paths([os.path.join(p, ".root") for p in parents], 0.5)
+        for path, exists in zip(parents, found):
+            if exists:
                 return str(path)
         return src
 
@@ -147,19 +178,44 @@ def go_to() -> None:
     def _format_sep(s: str) -> str:
         return s.replace("/", os.sep)
 
+    def _normalize(s: str) -> str:
+        return _format_sep(s).lower()
+
+    root = pane.currentPath
+    top = (
+        PrefixFilter(pane.names, _normalize),
+        frozenset(item.getName() for item in pane.dirs),
+    )
+    filters: dict[str, tuple[list[str], PrefixFilter, frozenset[str]]] = {}
+
+    def _filter_for(parent: str) -> tuple[PrefixFilter, frozenset[str]] | None:
+        if parent == "":
+            return top
+        listing = DIR_LISTINGS.get(os.path.join(root, parent))
+        if listing is None:
+            return None
+        cached = filters.get(parent)
+        if cached is None or cached[0] is not listing.names:
+            cached = (
+                listing.names,
+                PrefixFilter([os.path.join(parent, n) for n in listing.names], _normalize),
+                frozenset(os.path.join(parent, d) for d in listing.dirs),
+            )
+            filters[parent] = cached
+        return cached[1], cached[2]
+
     def _listup_names(update_info: ckit.ckit_widget.EditWidget.UpdateInfo) -> tuple:
         t = _format_sep(update_info.text)
-        names = pane.names
-        if os.sep in t:
-            root = pane.currentPath
-            names = [
-                str(p)[len(root) + 1 :]
-                for p in Path(root, t[: t.rfind(os.sep)]).glob("*")
-            ]
-
-        found = [
-            name for name in names if _format_sep(name).lower().startswith(t.lower())
-        ]
+        parent = t[: t.rfind(os.sep)] if os.sep in t else ""
+        source = _filter_for(parent)
+        if source is None:
+            return [], 0
+        name_filter, dirs = source
+        found = name_filter.current(t)
+        for name in found:
+            if name in dirs:
+                DIR_LISTINGS.prefetch(os.path.join(root, name))
+                break
         return found, 0
 
     result = stringify(
@@ -171,7 +227,7 @@ def go_to() -> None:
     )
 
     if result != "":
-        pane.openPath(os.path.join(pane.currentPath, result))
+        pane.openPath(os.path.join(root, result))
 
 
 def traverse_dir(root: Path, max_depth: int, current_depth: int = 0) -> list[Path]:
@@ -201,33 +257,19 @@ def to_ghq_repo() -> None:
         return
 
     def _listup(job_item: ckit.JobItem) -> None:
-        job_item.rel_path = None
-
         root = Path(ghq_root)
-        rels = []
+        job_item.rels = []
         for p in traverse_dir(root, 3):
             rel = str(p.relative_to(root))
             if 1 < rel.count(os.sep):
-                rels.append(rel)
-
-        fzf_result = subprocess.run(
-            ["fzf"],
-            input="\n".join(rels),
-            capture_output=True,
-            encoding="utf-8",
-            check=False,
-        )
-        if fzf_result.returncode != 0 and (e := fzf_result.stderr):
-            kiritori.log(e)
-            return
-
-        job_item.rel_path = fzf_result.stdout.strip()
+                job_item.rels.append(rel)
 
     def _open(job_item: ckit.JobItem) -> None:
-        if not job_item.rel_path:
+        rel_path = fuzzy.pick("Repository", job_item.rels)
+        if not rel_path:
             return
 
-        path = Path(ghq_root) / job_item.rel_path
+        path = Path(ghq_root) / rel_path
         if smart_check_path(path / ".git"):
             v = listwindow.ask_open_by_vscode()
             if v is None:
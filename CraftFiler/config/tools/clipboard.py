@@ -6,7 +6,7 @@ from pathlib import Path
 import ckit  # type: ignore
 from PIL import ImageGrab  # type: ignore
 
-from . import cpane, kiritori, linker, listwindow, office
+from . import cpane, kiritori, linker, listwindow, office, walker
 from .common import get_now
 
 
@@ -20,23 +20,29 @@ def setup(_window) -> None:
     office.setup(window)
 
 
-def copy_dir_tree() -> None:
+def copy_dir_tree(gitignore: bool = False) -> None:
     pane = cpane.CPane()
     selected_names = pane.selectedItemNames
     root = pane.currentPath
     window.setProgressValue(None)
 
+    def _prune(entry: walker.WalkEntry) -> bool:
+        if len(selected_names) < 1 or os.sep in entry.relpath:
+            return False
+        return entry.relpath not in selected_names
+
     def _traverse(job_item: ckit.JobItem) -> None:
         job_item.paths = []
-        for item in pane.traverse(False):
+        for entry in pane.walk(
+            prune=_prune,
+            workers=walker.WALK_WORKERS,
+            ordered=False,
+            is_canceled=job_item.isCanceled,
+            gitignore=gitignore,
+        ):
             if job_item.isCanceled():
                 return
-            rel = item.getFullpath()[len(root) :].lstrip(os.sep)
-            if len(selected_names) < 1 or any(
-                (rel == name or rel.startswith(name + os.sep))
-                for name in selected_names
-            ):
-                job_item.paths.append(rel)
+            job_item.paths.append(entry.relpath)
 
     def _finished(job_item: ckit.JobItem) -> None:
         window.clearProgress()
@@ -119,20 +125,19 @@ def hook_copy() -> None:
         return
 
     def _copy(job_item: ckit.JobItem) -> None:
-        lines = []
-        for target in targets:
-            if result == 0:
-                lines.append(target)
-                continue
-            p = Path(target)
-            if result == 1:
-                lines.append(p.name)
-                continue
-            if result == 3:
-                content = office.read_openxml(target)
-                lines.append(content)
-                continue
-            lines.append(p.stem)
+        if result == 3:
+            lines = list(office.read_openxml_all(targets))
+        else:
+            lines = []
+            for target in targets:
+                if result == 0:
+                    lines.append(target)
+                    continue
+                p = Path(target)
+                if result == 1:
+                    lines.append(p.name)
+                    continue
+                lines.append(p.stem)
         ckit.setClipboardText("\n".join(lines))
         job_item.count = len(lines)
 
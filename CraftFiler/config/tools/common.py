@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import ctypes
 import datetime
 import os
 import shutil
 import subprocess
+import threading
 import time
 import webbrowser
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from enum import Enum, IntEnum
 from pathlib import Path
 from typing import Callable
@@ -74,23 +77,198 @@ def is_file_locked(path: Path | str) -> bool:
         return True
 
 
-def smart_check_path(path: str | Path, timeout_sec: float | None = None) -> bool:
+DRIVE_FIXED = 3
+DRIVE_RAMDISK = 6
+
+
+class PathProbe:
+    """
+    Process-wide `exists()` prober.
+    Paths on fixed local drives are checked inline. Anything that may hang
+    (network shares, mapped or removable drives) is probed on a shared pool,
+    at most `max_per_root` at a time per share or drive, so a dead one pins
+    only that many threads and never delays the others. A root whose probe
+    timed out is reported unreachable for `unreachable_ttl_sec`; other results
+    are cached for `ttl_sec`.
+    """
+
+    max_workers = 16
+    max_per_root = 2
+    ttl_sec = 2.0
+    unreachable_ttl_sec = 30.0
+    max_entries = 4096
+
+    def __init__(self) -> None:
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._results: dict[str, tuple[float, bool]] = {}
+        self._inflight: dict[str, Future] = {}
+        self._queued: dict[str, deque[tuple[str, Path, Future]]] = {}
+        self._running: dict[str, int] = {}
+        self._unreachable: dict[str, float] = {}
+        self._drive_types: dict[str, bool] = {}
+
+    @staticmethod
+    def to_key(path: str | Path) -> str:
+        return os.path.normcase(str(path))
+
+    @staticmethod
+    def root_of(key: str) -> str:
+        """UNC share or drive letter of `key`, "" for a relative path."""
+        drive, _ = os.path.splitdrive(key)
+        return drive
+
+    def may_hang(self, root: str) -> bool:
+        if root == "":
+            return False
+        if root.startswith(("\\\\", "//")):
+            return True
+        found = self._drive_types.get(root)
+        if found is None:
+            windll = getattr(ctypes, "windll", None)
+            if windll is None:
+                found = False
+            else:
+                drive_type = windll.kernel32.GetDriveTypeW(root + "\\")
+                found = drive_type not in (DRIVE_FIXED, DRIVE_RAMDISK)
+            self._drive_types[root] = found
+        return found
+
+    def is_unreachable(self, key: str) -> bool:
+        with self._lock:
+            return time.monotonic() < self._unreachable.get(self.root_of(key), 0)
+
+    def cached(self, key: str) -> bool | None:
+        if self.is_unreachable(key):
+            return False
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None and time.monotonic() < hit[0]:
+                return hit[1]
+        return None
+
+    def _store(self, key: str, result: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self.max_entries <= len(self._results):
+                self._results = {k: v for k, v in self._results.items() if now < v[0]}
+                if self.max_entries <= len(self._results):
+                    self._results.clear()
+            self._results[key] = (now + self.ttl_sec, result)
+            self._unreachable.pop(self.root_of(key), None)
+
+    def probe(self, key: str, path: Path) -> bool:
+        try:
+            result = path.exists()
+        except Exception:  # noqa: BLE001
+            result = False
+        self._store(key, result)
+        return result
+
+    def _run(self, root: str, key: str, path: Path, future: Future) -> None:
+        future.set_result(self.probe(key, path))
+        with self._lock:
+            queue = self._queued.get(root)
+            if queue:
+                self._start(root, *queue.popleft())
+            else:
+                self._running[root] -= 1
+
+    def _start(self, root: str, key: str, path: Path, future: Future) -> None:
+        # with `_lock` held
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="cfiler_probe"
+            )
+        self._pool.submit(self._run, root, key, path, future)
+
+    def submit(self, key: str, path: Path) -> Future:
+        """Queue a probe behind the others of the same root; done at once if unreachable."""
+        root = self.root_of(key)
+        with self._lock:
+            if (future := self._inflight.get(key)) is not None:
+                return future
+            future = Future()
+            if time.monotonic() < self._unreachable.get(root, 0):
+                future.set_result(False)
+                return future
+            self._inflight[key] = future
+            if self._running.get(root, 0) < self.max_per_root:
+                self._running[root] = self._running.get(root, 0) + 1
+                self._start(root, key, path, future)
+            else:
+                self._queued.setdefault(root, deque()).append((key, path, future))
+            return future
+
+    def timed_out(self, key: str) -> None:
+        root = self.root_of(key)
+        if root:
+            with self._lock:
+                self._unreachable[root] = time.monotonic() + self.unreachable_ttl_sec
+
+    def forget(self, prefix: str | None = None) -> None:
+        with self._lock:
+            if prefix is None:
+                self._results.clear()
+                self._unreachable.clear()
+                return
+            pref = self.to_key(prefix)
+            under = pref.rstrip(os.sep) + os.sep
+            self._results = {
+                k: v for k, v in self._results.items() if k != pref and not k.startswith(under)
+            }
+
+
+PATH_PROBE = PathProbe()
+
+
+def smart_check_path(
+    path: str | Path, timeout_sec: float | None = None, use_cache: bool = True
+) -> bool:
     """CASE-INSENSITIVE path check with timeout"""
-    p = path if isinstance(path, Path) else Path(path)
-    try:
-        future = ThreadPoolExecutor(max_workers=1).submit(p.exists)
-        return future.result(timeout_sec)
-    except Exception:  # noqa: BLE001
-        return False
+    return check_paths([path], timeout_sec, use_cache)[0]
+
+
+def check_paths(
+    paths: list[str | Path], timeout_sec: float | None = None, use_cache: bool = True
+) -> list[bool]:
+    """
+    Probe many paths concurrently under one shared deadline.
+    Pass `use_cache=False` where a stale answer matters, e.g. "already exists" guards.
+    """
+    results: list[bool | None] = []
+    pending: dict[int, tuple[str, Future]] = {}
+    for i, path in enumerate(paths):
+        p = path if isinstance(path, Path) else Path(path)
+        key = PATH_PROBE.to_key(p)
+        hit = PATH_PROBE.cached(key) if use_cache else None
+        if hit is None and not PATH_PROBE.may_hang(PATH_PROBE.root_of(key)):
+            hit = PATH_PROBE.probe(key, p)
+        results.append(hit)
+        if hit is None:
+            pending[i] = (key, PATH_PROBE.submit(key, p))
+
+    if 0 < len(pending):
+        wait([f for _, f in pending.values()], timeout_sec)
+        for i, (key, future) in pending.items():
+            if future.done():
+                results[i] = future.result()
+            else:
+                PATH_PROBE.timed_out(key)
+                results[i] = False
+
+    return [bool(r) for r in results]
+
+
+def forget_checked_paths(prefix: str | None = None) -> None:
+    PATH_PROBE.forget(prefix)
 
 
 DESKTOP_PATH = os.path.expandvars(r"${USERPROFILE}\Desktop")
 
 CFILER_APPDATA_PATH = os.path.join(ckit.getAppDataPath(), "CraftFiler")
-
-
-def check_fzf() -> bool:
-    return shutil.which("fzf.exe") is not None
+CACHE_DIR = os.path.join(CFILER_APPDATA_PATH, "cache")
 
 
 def open_vscode(*args: str) -> bool:
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import hashlib
 import os
 import shutil
 import unicodedata
@@ -8,9 +7,10 @@ from typing import Iterator
 
 import ckit  # type: ignore
 
-from . import cpane, kiritori
+from . import cpane, kiritori, walker
 from .common import open_vscode, resolve_scoop_shim, shell_exec
-from .protocols import ItemDefaultProtocol
+from .filehash import HashTarget, find_duplicates, full_digest, partial_digest
+from .hash_cache import HASH_CACHE
 
 
 def setup(_window) -> None:
@@ -35,76 +35,97 @@ class FileHashDiff:
                 n += 1
         return n
 
-    def to_hash(self, path: str) -> str:
-        mb = 1024 * 1024
-        read_size = 1 * mb if self.max_mb * mb < os.path.getsize(path) else None
-        with open(path, "rb") as f:
-            digest = hashlib.md5(f.read(read_size)).hexdigest()
+    @property
+    def full_limit(self) -> int:
+        return self.max_mb * 1024 * 1024
+
+    def to_partial_hash(self, target: HashTarget, job_item: ckit.JobItem) -> str | None:
+        if (digest := HASH_CACHE.get(target.path)) is not None:
+            return digest
+        digest = partial_digest(target.path, target.size, job_item.isCanceled)
+        if digest is not None:
+            HASH_CACHE.put(target.path, digest)
+        return digest
+
+    def to_hash(self, target: HashTarget, job_item: ckit.JobItem) -> str | None:
+        if (digest := HASH_CACHE.get(target.path, self.full_limit)) is not None:
+            return digest
+        digest = full_digest(target.path, job_item.isCanceled, self.full_limit)
+        if digest is not None:
+            HASH_CACHE.put(target.path, digest, self.full_limit)
         return digest
 
-    def progress(self, name: str) -> None:
-        print(f"checking first {self.max_mb}MB of: {name}")
+    def progress(self, stage: str, count: int) -> None:
+        label = {
+            "size": "same size",
+            "partial": "same head/tail",
+            "full": f"same first {self.max_mb}MB",
+        }.get(stage, stage)
+        print(f"{label}: {count} files")
 
     def compare(self) -> None:
         pane = cpane.CPane()
         other_pane = cpane.CPane(False)
         with_selection = other_pane.hasSelection
-        _, dirname = os.path.split(pane.currentPath)
-        _, other_dirname = os.path.split(other_pane.currentPath)
+        other_root = other_pane.currentPath
 
         def _scan(job_item: ckit.JobItem) -> None:
-            targets = []
+            job_item.clones = {}
+            HASH_CACHE.reset_stats()
+            lefts: list[HashTarget] = []
             for item in pane.selectedOrAllItems:
-                pane.unSelectByName(item.getName())
                 if not item.isdir():
-                    targets.append(item)
+                    lefts.append(HashTarget(item.getFullpath(), item.size()))
+            pane.unSelectAll()
 
-            if len(targets) < 1:
+            if len(lefts) < 1:
                 return
 
             kiritori.draw_header("Comparing md5 hash:")
 
             window.setProgressValue(None)
 
-            table = {}
-            exts = set()
-
-            for file in targets:
-                if job_item.isCanceled():
-                    return
-                path = file.getFullpath()
-                digest = self.to_hash(path)
-                _, name = os.path.split(path)
-                _, ext = os.path.splitext(name)
-                self.progress(dirname + os.sep + name)
-                table[digest] = table.get(digest, []) + [name]
-                exts.add(ext)
-
-            def __files_to_compare() -> (
-                Iterator[ItemDefaultProtocol] | list[ItemDefaultProtocol]
-            ):
+            def __files_to_compare() -> Iterator[HashTarget]:
                 if with_selection:
                     sels = other_pane.selectedItems
                     other_pane.unSelectAll()
-                    return sels
-                return other_pane.traverse(True)
-
-            clones: dict[str, list[str]] = {}
-
-            for item in __files_to_compare():
+                    for item in sels:
+                        if not item.isdir():
+                            yield HashTarget(item.getFullpath(), item.size())
+                    return
+                for entry in other_pane.walk(
+                    True,
+                    workers=walker.WALK_WORKERS,
+                    ordered=False,
+                    is_canceled=job_item.isCanceled,
+                ):
+                    yield HashTarget(entry.fullpath, entry.size)
+
+            rights: list[HashTarget] = []
+            for target in __files_to_compare():
                 if job_item.isCanceled():
                     return
-                path = item.getFullpath()
-                _, ext = os.path.splitext(path)
-                if ext not in exts:
-                    continue
-                rel = os.path.relpath(path, other_pane.currentPath)
-                self.progress(other_dirname + os.sep + rel)
-                digest = self.to_hash(path)
-                if digest in table:
-                    names = table[digest]
-                    for name in names:
-                        clones[name] = clones.get(name, []) + [rel]
+                rights.append(target)
+            print(f"left: {len(lefts)} files / right: {len(rights)} files")
+
+            try:
+                groups = find_duplicates(
+                    lefts,
+                    rights,
+                    lambda t: self.to_partial_hash(t, job_item),
+                    lambda t: self.to_hash(t, job_item),
+                    job_item.isCanceled,
+                    self.progress,
+                )
+            finally:
+                HASH_CACHE.flush()
+
+            clones: dict[str, list[str]] = {}
+            for left_group, right_group in groups:
+                rels = sorted(os.path.relpath(t.path, other_root) for t in right_group)
+                for t in left_group:
+                    _, name = os.path.split(t.path)
+                    clones[name] = clones.get(name, []) + rels
 
             job_item.clones = clones
 
@@ -117,19 +138,21 @@ class FileHashDiff:
                 if not job_item.clones or len(job_item.clones) < 1:
                     print("(There was no clone)")
                 else:
+                    pane.setSelection(job_item.clones.keys())
+                    other_pane.setSelection(
+                        n
+                        for clone_names in job_item.clones.values()
+                        for n in clone_names
+                        if os.sep not in n
+                    )
                     for name, clone_names in job_item.clones.items():
-                        pane.selectByName(name)
-                        other_pane.selectByNames(
-                            [n for n in clone_names if os.sep not in n]
-                        )
-
                         filler = " " * self.count_bytes(name)
                         for i, n in enumerate(clone_names):
                             if i == 0:
                                 print(name, "==", n)
                             else:
                                 print(filler, "==", n)
-                kiritori.draw_footer()
+                kiritori.draw_footer(HASH_CACHE.stats)
 
         job = ckit.JobItem(_scan, _finish)
         window.taskEnqueue(job, create_new_queue=False)
@@ -2,22 +2,21 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Callable, Iterator, NamedTuple
+from typing import Callable, Iterable, Iterator, NamedTuple
 
-import cfiler_debug  # type: ignore
 import ckit  # type: ignore
 from cfiler_filelist import (  # type: ignore
     FileList,
-    item_Default,
     item_Empty,
     lister_Default,
 )
 from cfiler_mainwindow import MainWindow  # type: ignore
 
-from . import kiritori
+from . import kiritori, pane_snapshot, walker
 from .common import (
     ColWidth,
     PaintOption,
+    forget_checked_paths,
     smart_check_path,
 )
 from .protocols import ItemDefaultProtocol, PaneEntityProtocol
@@ -34,12 +33,12 @@ class CPane:
     def __init__(self, active: bool = True) -> None:
         if active:
             self._pane = window.activePane()
-            self._items = window.activeItems()
             self._other = window.inactivePane()
         else:
             self._pane = window.inactivePane()
-            self._items = window.inactiveItems()
             self._other = window.activePane()
+        self._snapshot: pane_snapshot.PaneSnapshot | None = None
+        self._touched: set[int] = set()
 
     @property
     def entity(self) -> PaneEntityProtocol:
@@ -51,6 +50,29 @@ class CPane:
     def refresh(self) -> None:
         window.subThreadCall(self.fileList.refresh, (False, True))
         self.fileList.applyItems()
+        self.dropSnapshot()
+        forget_checked_paths(self.currentPath)
+
+    @property
+    def snapshot(self) -> pane_snapshot.PaneSnapshot:
+        snap = self._snapshot
+        if snap is None or not snap.matches(self.fileList):
+            snap = pane_snapshot.take(self.fileList)
+        elif self._touched:
+            snap = snap.resync_selection(self._touched)
+            pane_snapshot.store(self.fileList, snap)
+        self._touched.clear()
+        self._snapshot = snap
+        return snap
+
+    def dropSnapshot(self) -> None:
+        self._snapshot = None
+        self._touched.clear()
+        pane_snapshot.invalidate(self.fileList)
+
+    def _markSelectionChanged(self, i: int) -> None:
+        if self._snapshot is not None:
+            self._touched.add(i)
 
     def setSorter(self, sorter: Callable[[list[ItemDefaultProtocol]], None]) -> None:
         window.subThreadCall(self.fileList.setSorter, (sorter,))
@@ -58,41 +80,19 @@ class CPane:
 
     @property
     def items(self) -> list[ItemDefaultProtocol]:
-        if self.isBlank:
-            return []
-        return self._items
+        return list(self.snapshot.items)
 
     @property
     def dirs(self) -> list[ItemDefaultProtocol]:
-        items = []
-        if self.isBlank:
-            return items
-        for i in range(self.count):
-            item = self.byIndex(i)
-            if item.isdir():
-                items.append(item)
-        return items
+        return self.snapshot.dirs
 
     @property
     def files(self) -> list[ItemDefaultProtocol]:
-        items = []
-        if self.isBlank:
-            return items
-        for i in range(self.count):
-            item = self.byIndex(i)
-            if not item.isdir():
-                items.append(item)
-        return items
+        return self.snapshot.files
 
     @property
     def stems(self) -> list[str]:
-        items = []
-        if self.isBlank:
-            return items
-        for i in range(self.count):
-            path = self.pathByIndex(i)
-            items.append(Path(path).stem)
-        return items
+        return self.snapshot.stems
 
     def appendHistory(self, path: str, mark: bool = False) -> None:
         p = Path(path)
@@ -110,7 +110,7 @@ class CPane:
             self.scrollToCursor()
 
     def byName(self, name: str) -> int:
-        return self.fileList.indexOf(name)
+        return self.snapshot.indexOf(name)
 
     def hasName(self, name: str) -> bool:
         return self.byName(name) != -1
@@ -152,14 +152,11 @@ class CPane:
 
     @property
     def hasSelection(self) -> bool:
-        return self.fileList.selected()
+        return self.snapshot.hasSelection
 
     @property
     def hasBookmark(self) -> bool:
-        for item in self.items:
-            if item.bookmark():
-                return True
-        return False
+        return self.snapshot.hasBookmark
 
     @property
     def scrollInfo(self) -> ckit.ScrollInfo:
@@ -182,40 +179,20 @@ class CPane:
 
     @property
     def names(self) -> list[str]:
-        names = []
-        if self.isBlank:
-            return names
-        for i in range(self.count):
-            item = self.byIndex(i)
-            names.append(item.getName())
-        return names
+        return list(self.snapshot.names)
 
     @property
     def paths(self) -> list[str]:
-        return [os.path.join(self.currentPath, name) for name in self.names]
+        root = self.currentPath
+        return [os.path.join(root, name) for name in self.snapshot.names]
 
     @property
     def extensions(self) -> list[str]:
-        exts = []
-        if self.isBlank:
-            return exts
-        for i in range(self.count):
-            path = Path(self.pathByIndex(i))
-            ext = path.suffix.replace(".", "")
-            if path.is_file() and ext not in exts:
-                exts.append(ext)
-        return exts
+        return self.snapshot.extensions
 
     @property
     def selectedItems(self) -> list[ItemDefaultProtocol]:
-        items = []
-        if self.isBlank:
-            return items
-        for i in range(self.count):
-            item = self.byIndex(i)
-            if item.selected():
-                items.append(item)
-        return items
+        return self.snapshot.selectedItems
 
     @property
     def selectedOrAllItems(self) -> list[ItemDefaultProtocol]:
@@ -260,69 +237,102 @@ class CPane:
     def toggleSelection(self, i: int, flush: bool = True) -> None:
         if self.isValidIndex(i):
             self.fileList.selectItem(i, None)
+            self._markSelectionChanged(i)
             if flush:
                 self.applySelectionHighlight()
 
     def setSelectionState(self, i: int, state: bool, flush: bool) -> None:
         if self.isValidIndex(i):
             self.fileList.selectItem(i, state)
+            self._markSelectionChanged(i)
             if flush:
                 self.applySelectionHighlight()
 
+    def setSelection(
+        self,
+        targets: Iterable[str | int],
+        state: bool | None = True,
+        flush: bool = True,
+    ) -> int:
+        """
+        Bulk selection by names and/or indices with a single repaint.
+        `state=None` toggles. Unknown names and out-of-range indices are ignored.
+        Returns the number of items touched.
+        """
+        snap = self.snapshot
+        n = snap.count
+        idxs = []
+        for t in targets:
+            i = snap.indexOf(t) if isinstance(t, str) else t
+            if 0 <= i < n:
+                idxs.append(i)
+        for i in idxs:
+            self.fileList.selectItem(i, state)
+        self._touched.update(idxs)
+        if flush and 0 < len(idxs):
+            self.applySelectionHighlight()
+        return len(idxs)
+
+    def selectOnly(self, targets: Iterable[str | int], flush: bool = True) -> int:
+        """
+        Make `targets` the whole selection in one pass: only items whose state
+        differs are flipped, with at most one repaint. Returns the number flipped.
+        """
+        snap = self.snapshot
+        n = snap.count
+        wanted = bytearray(n)
+        for t in targets:
+            i = snap.indexOf(t) if isinstance(t, str) else t
+            if 0 <= i < n:
+                wanted[i] = 1
+        idxs = [i for i in range(n) if wanted[i] != snap.selected[i]]
+        for i in idxs:
+            self.fileList.selectItem(i, bool(wanted[i]))
+        self._touched.update(idxs)
+        if flush and 0 < len(idxs):
+            self.applySelectionHighlight()
+        return len(idxs)
+
+    @property
+    def selectedOrAllIndices(self) -> list[int]:
+        snap = self.snapshot
+        if snap.hasSelection:
+            return snap.selectedIndices
+        return list(range(snap.count))
+
     def select(self, i: int, flush: bool = True) -> None:
         self.setSelectionState(i, True, flush)
 
     def selectAll(self) -> None:
-        for i in range(self.count):
-            self.select(i, False)
+        self.setSelection(range(self.snapshot.count), True, False)
         self.applySelectionHighlight()
 
     def unSelect(self, i: int, flush: bool = True) -> None:
         self.setSelectionState(i, False, flush)
 
     def unSelectAll(self) -> None:
-        for i in range(self.count):
-            self.unSelect(i, False)
+        self.setSelection(range(self.snapshot.count), False, False)
         self.applySelectionHighlight()
 
     def selectByName(self, name: str) -> None:
-        i = self.byName(name)
-        if i < 0:
-            return
-        self.select(i)
-        self.applySelectionHighlight()
+        self.setSelection([name], True)
 
     def unSelectByName(self, name: str) -> None:
-        i = self.byName(name)
-        if i < 0:
-            return
-        self.unSelect(i)
-        self.applySelectionHighlight()
+        self.setSelection([name], False)
 
-    def selectByNames(self, names: list) -> None:
-        for name in names:
-            self.selectByName(name)
+    def selectByNames(self, names: Iterable[str]) -> None:
+        self.setSelection(names, True)
+
+    def unSelectByNames(self, names: Iterable[str]) -> None:
+        self.setSelection(names, False)
 
     @property
     def selectionTop(self) -> int:
-        if not self.hasSelection:
-            return -1
-        for i in range(self.count):
-            if self.byIndex(i).selected():
-                return i
-        return -1
+        return self.snapshot.selectionTop
 
     @property
     def selectionBottom(self) -> int:
-        if not self.hasSelection:
-            return -1
-        idxs = []
-        for i in range(self.count):
-            if self.byIndex(i).selected():
-                idxs.append(i)
-        if len(idxs) < 1:
-            return -1
-        return idxs[-1]
+        return self.snapshot.selectionBottom
 
     def scrollTo(self, i: int) -> None:
         self.scrollInfo.makeVisible(i, window.fileListItemPaneHeight(), 1)
@@ -370,13 +380,14 @@ class CPane:
 
         lister = lister_Default(window, path)
         window.jumpLister(self.entity, lister, focus_name)
+        self.dropSnapshot()
 
     def touch(self, name: str) -> None:
         if not hasattr(self.lister, "touch"):
             kiritori.log("cannot make file here.")
             return
         dp = Path(self.currentPath, name)
-        if smart_check_path(dp) and dp.is_file():
+        if smart_check_path(dp, use_cache=False) and dp.is_file():
             kiritori.log(f"file '{name}' already exists.")
             return
         window.subThreadCall(self.lister.touch, (name,))
@@ -388,7 +399,7 @@ class CPane:
             kiritori.log("cannot make directory here.")
             return
         dp = Path(self.currentPath, name)
-        if smart_check_path(dp) and dp.is_dir():
+        if smart_check_path(dp, use_cache=False) and dp.is_dir():
             kiritori.log(f"directory '{name}' already exists.")
             self.focusByName(name)
             return
@@ -412,37 +423,36 @@ class CPane:
         )
         child_lister.destroy()
 
+    def walk(
+        self,
+        only_file: bool = False,
+        ignore_dirnames: Iterable[str] = (),
+        max_depth: int | None = None,
+        prune: walker.PruneFunc | None = None,
+        workers: int = 1,
+        ordered: bool = True,
+        is_canceled: walker.CancelCheck | None = None,
+        gitignore: bool = False,
+    ) -> Iterator[walker.WalkEntry]:
+        return walker.walk(
+            self.currentPath,
+            only_file,
+            ignore_dirnames,
+            max_depth,
+            prune,
+            workers,
+            ordered,
+            is_canceled,
+            gitignore,
+        )
+
     def traverse(
-        self, only_file: bool, *ignore_dirnames: str
+        self, only_file: bool, *ignore_dirnames: str, gitignore: bool = False
     ) -> Iterator[ItemDefaultProtocol]:
-        class FileListEntry:
-            def __init__(self, root: str, path: str) -> None:
-                self.root = root
-                self.dirname = path[len(root) :].lstrip(os.sep)
-
-            def __call__(self, name) -> ItemDefaultProtocol | None:
-                try:
-                    item: ItemDefaultProtocol = item_Default(
-                        self.root, ckit.joinPath(self.dirname, name)
-                    )
-                    return item
-                except Exception:  # noqa: BLE001
-                    cfiler_debug.printErrorInfo()
-                    return None
-
-        ignore_list = list(ignore_dirnames) + ["node_modules"]
-        for dirpath, subdirs, subfiles in os.walk(self.currentPath):
-            subdirs[:] = [
-                dn for dn in subdirs if not dn.startswith(".") and dn not in ignore_list
-            ]
-            subfiles[:] = [fn for fn in subfiles if not fn.startswith("~$_")]
-            ent = FileListEntry(self.currentPath, dirpath)
-            if not only_file:
-                yield from filter(
-                    None,
-                    map(ent, subdirs),
-                )
-            yield from filter(None, map(ent, subfiles))
+        for entry in self.walk(only_file, ignore_dirnames, gitignore=gitignore):
+            item = entry.to_item()
+            if item is not None:
+                yield item
 
 
 class LeftPane(CPane):
@@ -480,11 +490,11 @@ def swap_pane() -> None:
     other_focus_name = None if other.isBlank else other.focusedItem.getName()
 
     active.openPath(other_path, other_focus_name)
-    active.selectByNames(ogther_selects)
+    active.setSelection(ogther_selects, True)
     active.setSorter(other_sorter)
 
     other.openPath(active_path, active_focus_name)
-    other.selectByNames(active_selects)
+    other.setSelection(active_selects, True)
     other.setSorter(active_sorter)
 
     LeftPane().activate()
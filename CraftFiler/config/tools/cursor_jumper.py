@@ -31,11 +31,12 @@ def get_block_edges(idxs: list[int]) -> list[int]:
 
 
 def get_base_edges(pane: cpane.CPane) -> list[int]:
+    snap = pane.snapshot
     edges = [0]
     edges.append(pane.count - 1)
-    if 0 < (nd := len(pane.dirs)):
+    if 0 < (nd := snap.dirCount):
         edges.append(nd - 1)
-        if 0 < len(pane.files):
+        if nd < snap.count:
             edges.append(nd)
     return edges
 
@@ -43,10 +44,10 @@ def get_base_edges(pane: cpane.CPane) -> list[int]:
 def get_item_edges(pane: cpane.CPane) -> list[int]:
     if pane.isBlank:
         return []
+    snap = pane.snapshot
     stack = get_base_edges(pane)
-    for i in range(pane.count):
-        item = pane.byIndex(i)
-        if item.bookmark() or item.selected():
+    for i, (b, s) in enumerate(zip(snap.bookmarked, snap.selected)):
+        if b or s:
             stack.append(i)
     stack = get_block_edges(stack)
     return sorted(set(stack))
@@ -55,7 +56,7 @@ def get_item_edges(pane: cpane.CPane) -> list[int]:
 def get_prefix_edges(pane: cpane.CPane) -> list[int]:
     if pane.isBlank:
         return []
-    names = pane.names
+    names = pane.snapshot.names
     if len(names) < 2:
         return []
     prefs = [name.split("_", 1)[0] for name in names]
@@ -83,9 +84,7 @@ def jump_down(by_prefix: bool, selecting: bool) -> None:
     if idx < 0:
         return
     if selecting:
-        for i in range(pane.count):
-            if cur <= i <= idx:
-                pane.select(i)
+        pane.setSelection(range(cur, idx + 1))
     pane.focus(idx)
 
 
@@ -102,7 +101,5 @@ def jump_up(by_prefix: bool, selecting: bool) -> None:
     if idx < 0:
         return
     if selecting:
-        for i in range(pane.count):
-            if idx <= i <= cur:
-                pane.select(i)
+        pane.setSelection(range(idx, cur + 1))
     pane.focus(idx)
@@ -1,8 +1,4 @@
-import subprocess
-
-import ckit  # type: ignore
-
-from . import cpane, kiritori
+from . import cpane, fuzzy, kiritori
 from .protocols import ItemDefaultProtocol
 
 
@@ -12,6 +8,7 @@ def setup(_window) -> None:
 
     kiritori.setup(window)
     cpane.setup(window)
+    fuzzy.setup(window)
 
 
 def smart_cursorUp() -> None:
@@ -100,31 +97,6 @@ def fuzzy_focus() -> None:
     if len(names) < 1:
         return
 
-    def _select(job_item: ckit.JobItem) -> None:
-        job_item.selected = None
-        proc = subprocess.run(
-            [
-                "fzf.exe",
-                "--margin=1",
-                "--no-color",
-                "--input-border=sharp",
-                "--layout=reverse",
-            ],
-            input="\n".join(names),
-            capture_output=True,
-            encoding="utf-8",
-            check=False,
-        )
-
-        if proc.returncode != 0 and (e := proc.stderr):
-            kiritori.log(e)
-            return
-        job_item.selected = proc.stdout.strip()
-
-    def _focus(job_item: ckit.JobItem) -> None:
-        name = job_item.selected
-        if name is not None:
-            pane.focusByName(name)
-
-    job = ckit.JobItem(_select, _focus)
-    window.taskEnqueue(job, create_new_queue=False)
+    name = fuzzy.pick("Focus", names)
+    if name:
+        pane.focusByName(name)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+
+class DirListing(NamedTuple):
+    mtime: float
+    checked_at: float
+    names: list[str]
+    dirs: frozenset[str]
+
+
+class DirListingCache:
+    """
+    Directory listings keyed by (path, mtime), least recently used evicted first.
+    Listing and re-validation run on a small background pool: `get` answers from
+    the cache at once (possibly a little stale) and only waits up to `wait_sec`
+    for a directory it has never seen.
+    """
+
+    max_dirs = 64
+    max_workers = 2
+    recheck_sec = 1.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        self._entries: dict[str, DirListing] = {}
+        self._inflight: dict[str, Future] = {}
+
+    @staticmethod
+    def to_key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _list(self, key: str, path: str) -> DirListing | None:
+        try:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                return None
+            with self._lock:
+                found = self._entries.get(key)
+            if found is not None and found.mtime == mtime:
+                found = found._replace(checked_at=time.monotonic())
+            else:
+                names = []
+                dirs = set()
+                try:
+                    with os.scandir(path) as it:
+                        for de in it:
+                            names.append(de.name)
+                            try:
+                                if de.is_dir():
+                                    dirs.add(de.name)
+                            except OSError:
+                                pass
+                except OSError:
+                    return None
+                found = DirListing(mtime, time.monotonic(), names, frozenset(dirs))
+            with self._lock:
+                self._entries.pop(key, None)
+                self._entries[key] = found
+                while self.max_dirs < len(self._entries):
+                    self._entries.pop(next(iter(self._entries)))
+            return found
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _submit(self, key: str, path: str) -> Future:
+        with self._lock:
+            if (future := self._inflight.get(key)) is not None:
+                return future
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="cfiler_listing"
+                )
+            future = self._pool.submit(self._list, key, path)
+            self._inflight[key] = future
+            return future
+
+    def get(self, path: str, wait_sec: float = 0.05) -> DirListing | None:
+        key = self.to_key(path)
+        with self._lock:
+            found = self._entries.pop(key, None)
+            if found is not None:
+                self._entries[key] = found  # most recently used goes last
+        if found is not None:
+            if self.recheck_sec < time.monotonic() - found.checked_at:
+                self._submit(key, path)
+            return found
+        future = self._submit(key, path)
+        wait([future], wait_sec)
+        if future.done():
+            return future.result()
+        return None
+
+    def prefetch(self, path: str) -> None:
+        key = self.to_key(path)
+        with self._lock:
+            if key in self._entries:
+                return
+        self._submit(key, path)
+
+
+DIR_LISTINGS = DirListingCache()
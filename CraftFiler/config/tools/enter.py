@@ -7,7 +7,7 @@ from typing import Callable
 
 from . import archiver, cpane, listwindow, office
 from .browser_info import get_default_browser
-from .common import open_vscode, shell_exec, smart_check_path
+from .common import check_paths, open_vscode, shell_exec, smart_check_path
 
 
 def setup(_window) -> None:
@@ -106,24 +106,33 @@ def open_with() -> None:
     if len(paths) < 1 and not pane.focusedItem.isdir():
         paths.append(pane.focusedItemPath)
 
+    has_pdf = any(path.endswith(".pdf") for path in paths)
+    is_text = all((Path(path).suffix in [".txt", ".csv"]) for path in paths)
+
+    sumatra_path = r"C:\Program Files\SumatraPDF\SumatraPDF.exe"
+    acrobat_path = r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe"
+    acrobat_reader_path = r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe"
+    smooth_csv_path = r"C:\Program Files\SmoothCSV\smoothcsv-app.exe"
+
+    candidates = []
+    if has_pdf:
+        candidates += [sumatra_path, acrobat_path, acrobat_reader_path]
+    if is_text:
+        candidates.append(smooth_csv_path)
+    installed = {path for path, ok in zip(candidates, check_paths(candidates)) if ok}
+
     app_table = {}
     if len({Path(p).suffix for p in paths}) != 1:
         app_table["(associated app)"] = shell_exec
 
-    if any(path.endswith(".pdf") for path in paths):
-        sumatra_path = r"C:\Program Files\SumatraPDF\SumatraPDF.exe"
-        if smart_check_path(sumatra_path):
+    if has_pdf:
+        if sumatra_path in installed:
             app_table["sumatra"] = sumatra_path
 
-        acrobat_path = r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe"
-        if smart_check_path(acrobat_path):
+        if acrobat_path in installed:
             app_table["adobe"] = acrobat_path
-        else:
-            acrobat_reader_path = (
-                r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe"
-            )
-            if smart_check_path(acrobat_reader_path):
-                app_table["adobe-reader"] = acrobat_reader_path
+        elif acrobat_reader_path in installed:
+            app_table["adobe-reader"] = acrobat_reader_path
 
         if (xedit_path := shutil.which("pdfxedit")) is not None:
             app_table["xEdit"] = xedit_path
@@ -135,10 +144,8 @@ def open_with() -> None:
     app_table["mery"] = os.path.expandvars(r"${LOCALAPPDATA}\Programs\Mery\Mery.exe")
     app_table["vscode"] = lambda x: open_vscode(x, "--new-window")
 
-    if all((Path(path).suffix in [".txt", ".csv"]) for path in paths):
-        smooth_csv_path = r"C:\Program Files\SmoothCSV\smoothcsv-app.exe"
-        if smart_check_path(smooth_csv_path):
-            app_table["smooth csv"] = smooth_csv_path
+    if smooth_csv_path in installed:
+        app_table["smooth csv"] = smooth_csv_path
 
     names = list(app_table.keys())
 
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, NamedTuple
+
+CHUNK_SIZE = 1024 * 1024
+SAMPLE_SIZE = 64 * 1024
+HASH_WORKERS = min(8, (os.cpu_count() or 2))
+
+CancelCheck = Callable[[], bool]
+
+
+class HashTarget(NamedTuple):
+    path: str
+    size: int
+
+
+def partial_digest(path: str, size: int, is_canceled: CancelCheck) -> str | None:
+    """md5 of the head and tail samples. Enough to split most same-size files."""
+    if is_canceled():
+        return None
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        h.update(f.read(SAMPLE_SIZE))
+        if SAMPLE_SIZE < size:
+            f.seek(max(SAMPLE_SIZE, size - SAMPLE_SIZE))
+            h.update(f.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+def full_digest(path: str, is_canceled: CancelCheck, limit: int | None = None) -> str | None:
+    """Streaming md5 with a fixed buffer; reads at most `limit` bytes if given."""
+    h = hashlib.md5()
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    remain = limit
+    with open(path, "rb", buffering=0) as f:
+        while remain is None or 0 < remain:
+            if is_canceled():
+                return None
+            want = CHUNK_SIZE if remain is None else min(CHUNK_SIZE, remain)
+            n = f.readinto(view[:want])
+            if not n:
+                break
+            h.update(view[:n])
+            if remain is not None:
+                remain -= n
+    return h.hexdigest()
+
+
+def digest_all(
+    func: Callable[[HashTarget], str | None],
+    targets: Iterable[HashTarget],
+    is_canceled: CancelCheck,
+) -> dict[HashTarget, str]:
+    """
+    Run `func` over `targets` on a thread pool (hashlib releases the GIL).
+    Unreadable files and canceled runs are simply left out of the result.
+    """
+
+    def _safe(t: HashTarget) -> str | None:
+        if is_canceled():
+            return None
+        try:
+            return func(t)
+        except OSError as e:
+            print(e)
+            return None
+
+    targets = list(targets)
+    table: dict[HashTarget, str] = {}
+    if len(targets) < 1:
+        return table
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        for t, digest in zip(targets, pool.map(_safe, targets)):
+            if digest is not None:
+                table[t] = digest
+    return table
+
+
+def find_duplicates(
+    lefts: list[HashTarget],
+    rights: list[HashTarget],
+    partial: Callable[[HashTarget], str | None],
+    full: Callable[[HashTarget], str | None],
+    is_canceled: CancelCheck,
+    on_stage: Callable[[str, int], None] | None = None,
+) -> list[tuple[list[HashTarget], list[HashTarget]]]:
+    """
+    Find files of `rights` with the same content as files of `lefts`.
+    Narrowing goes exact size -> `partial` digest -> `full` digest,
+    so only real candidates are ever read in full.
+    Returns (left group, right group) pairs with identical content.
+    """
+
+    def _notify(stage: str, n: int) -> None:
+        if on_stage is not None:
+            on_stage(stage, n)
+
+    left_sizes = {t.size for t in lefts}
+    rights = [t for t in rights if t.size in left_sizes]
+    right_sizes = {t.size for t in rights}
+    lefts = [t for t in lefts if t.size in right_sizes]
+    _notify("size", len(lefts) + len(rights))
+    if len(rights) < 1 or is_canceled():
+        return []
+
+    def _full(t: HashTarget) -> str | None:
+        # keep the sample digest in the key: `full` may stop short of the tail
+        if t.size <= SAMPLE_SIZE * 2:
+            return partial_digests[t]
+        digest = full(t)
+        if digest is None:
+            return None
+        return partial_digests[t] + digest
+
+    def _narrow(
+        keyed: dict[HashTarget, str],
+    ) -> tuple[list[HashTarget], list[HashTarget]]:
+        lk = {(t.size, keyed[t]) for t in lefts if t in keyed}
+        rk = {(t.size, keyed[t]) for t in rights if t in keyed}
+        both = lk & rk
+        return (
+            [t for t in lefts if t in keyed and (t.size, keyed[t]) in both],
+            [t for t in rights if t in keyed and (t.size, keyed[t]) in both],
+        )
+
+    partial_digests = digest_all(partial, lefts + rights, is_canceled)
+    lefts, rights = _narrow(partial_digests)
+    _notify("partial", len(lefts) + len(rights))
+    if len(rights) < 1 or is_canceled():
+        return []
+
+    full_digests = digest_all(_full, lefts + rights, is_canceled)
+    lefts, rights = _narrow(full_digests)
+    _notify("full", len(lefts) + len(rights))
+    if is_canceled():
+        return []
+
+    groups: dict[tuple[int, str], tuple[list[HashTarget], list[HashTarget]]] = {}
+    for t in lefts:
+        groups.setdefault((t.size, full_digests[t]), ([], []))[0].append(t)
+    for t in rights:
+        groups[(t.size, full_digests[t])][1].append(t)
+    return list(groups.values())
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import ckit  # type: ignore
+
+from .common import stringify
+
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_NON_WORD = SCORE_MATCH // 2
+BONUS_CAMEL = BONUS_BOUNDARY + SCORE_GAP_EXTENSION
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+CLASS_NON_WORD = 0
+CLASS_LOWER = 1
+CLASS_UPPER = 2
+CLASS_NUMBER = 3
+
+
+def setup(_window) -> None:
+    global window  # ty: ignore[unresolved-global]
+    window = _window
+
+
+def char_class(c: str) -> int:
+    if c.isdigit():
+        return CLASS_NUMBER
+    if c.isupper():
+        return CLASS_UPPER
+    if c.isalpha():
+        return CLASS_LOWER
+    return CLASS_NON_WORD
+
+
+def bonus_for(prev: int, cur: int) -> int:
+    if cur == CLASS_NON_WORD:
+        return BONUS_NON_WORD
+    if prev == CLASS_NON_WORD:
+        return BONUS_BOUNDARY
+    if (prev == CLASS_LOWER and cur == CLASS_UPPER) or (
+        prev != CLASS_NUMBER and cur == CLASS_NUMBER
+    ):
+        return BONUS_CAMEL
+    return 0
+
+
+def lower_keep_length(s: str) -> str:
+    """
+    Lowercase one character at a time, keeping only the first code point of
+    each, so indices into the result still address the original ("İ" would
+    otherwise become two code points).
+    """
+    return "".join(c.lower()[:1] for c in s)
+
+
+def char_mask(s: str) -> int:
+    """One bit per character (folded into 64 bits), to reject candidates cheaply."""
+    mask = 0
+    for c in s:
+        mask |= 1 << (ord(c) & 63)
+    return mask
+
+
+def match_range(text: str, pattern: str) -> tuple[int, int] | None:
+    """
+    Shortest window of `text` ending at the first full match of `pattern`:
+    scan forward to the end of the match, then backward to tighten its start.
+    """
+    pos = -1
+    for c in pattern:
+        pos = text.find(c, pos + 1)
+        if pos < 0:
+            return None
+    end = pos + 1
+    for c in reversed(pattern):
+        pos = text.rfind(c, 0, pos + 1) - 1
+    return pos + 1, end
+
+
+def score_range(original: str, text: str, pattern: str, start: int, end: int) -> int:
+    """fzf's v1 scoring of `pattern` over `text[start:end]`."""
+    score = 0
+    pidx = 0
+    in_gap = False
+    consecutive = 0
+    first_bonus = 0
+    prev = char_class(original[start - 1]) if 0 < start else CLASS_NON_WORD
+    for i in range(start, end):
+        cur = char_class(original[i])
+        if text[i] == pattern[pidx]:
+            score += SCORE_MATCH
+            bonus = bonus_for(prev, cur)
+            if consecutive == 0:
+                first_bonus = bonus
+            else:
+                if BONUS_BOUNDARY <= bonus and first_bonus < bonus:
+                    first_bonus = bonus
+                bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+            score += bonus * BONUS_FIRST_CHAR_MULTIPLIER if pidx == 0 else bonus
+            in_gap = False
+            consecutive += 1
+            pidx += 1
+            if pidx == len(pattern):
+                break
+        else:
+            score += SCORE_GAP_EXTENSION if in_gap else SCORE_GAP_START
+            in_gap = True
+            consecutive = 0
+            first_bonus = 0
+        prev = cur
+    return score
+
+
+class FuzzyMatcher:
+    """
+    In-process replacement for piping a list through fzf.
+    Lowercased text and character masks of the candidates are computed once.
+    Space-separated terms must all match; a term with an uppercase letter is
+    case-sensitive (smart case). When the query only grows, as while typing,
+    only the previous hits are re-scored.
+    """
+
+    limit = 200
+
+    def __init__(self, candidates: Iterable[str]) -> None:
+        self.candidates = list(dict.fromkeys(candidates))
+        self._known = set(self.candidates)
+        self._lowers = [lower_keep_length(c) for c in self.candidates]
+        self._masks = [char_mask(c) for c in self._lowers]
+        self._last_query = ""
+        self._last_hits = list(range(len(self.candidates)))
+
+    def _score(self, i: int, terms: list[str], masks: list[int]) -> int | None:
+        total = 0
+        for term, mask in zip(terms, masks):
+            if self._masks[i] & mask != mask:
+                return None
+            text = self.candidates[i] if term != lower_keep_length(term) else self._lowers[i]
+            found = match_range(text, term)
+            if found is None:
+                return None
+            total += score_range(self.candidates[i], text, term, *found)
+        return total
+
+    def rank(self, query: str) -> list[tuple[int, int]]:
+        """(score, index) of every matching candidate, best first."""
+        terms = query.split()
+        if len(terms) < 1:
+            self._last_query = ""
+            self._last_hits = list(range(len(self.candidates)))
+            return [(0, i) for i in self._last_hits]
+        masks = [char_mask(lower_keep_length(t)) for t in terms]
+        pool = (
+            self._last_hits
+            if self._last_query and query.startswith(self._last_query)
+            else range(len(self.candidates))
+        )
+        scored = []
+        for i in pool:
+            s = self._score(i, terms, masks)
+            if s is not None:
+                scored.append((s, i))
+        self._last_query = query
+        self._last_hits = sorted(i for _, i in scored)
+        scored.sort(key=lambda si: (-si[0], len(self.candidates[si[1]]), si[1]))
+        return scored
+
+    def match(self, query: str) -> list[str]:
+        return [self.candidates[i] for _, i in self.rank(query)[: self.limit]]
+
+    def handler(
+        self,
+    ) -> Callable[[ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]]:
+        def _handler(
+            update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
+        ) -> tuple[list[str], int]:
+            return self.match(update_info.text), 0
+
+        return _handler
+
+    def resolve(self, text: str) -> str:
+        """The candidate equal to `text`, or else the best match for it."""
+        if text in self._known:
+            return text
+        found = self.match(text)
+        if len(found) < 1:
+            return ""
+        return found[0]
+
+
+def pick(title: str, candidates: Iterable[str]) -> str:
+    """
+    Choose one of `candidates` on the command line, narrowing fuzzily as you type.
+    Returns "" when canceled or nothing matches.
+    """
+    matcher = FuzzyMatcher(candidates)
+    if len(matcher.candidates) < 1:
+        return ""
+    result = stringify(window.commandLine(title=title, candidate_handler=matcher.handler()))
+    if result == "":
+        return ""
+    return matcher.resolve(result)
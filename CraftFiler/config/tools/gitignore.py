@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+IGNORE_FILES = (".gitignore", ".ignore")
+IGNORE_CASE = os.name == "nt"
+
+
+def translate(pattern: str) -> str:
+    """Regex for one gitignore glob (without `!`, leading or trailing `/`)."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            j = i
+            while j < n and pattern[j] == "*":
+                j += 1
+            at_segment_start = i == 0 or pattern[i - 1] == "/"
+            if 2 <= j - i and at_segment_start:
+                if j == n:
+                    out.append(".*")
+                    i = j
+                    continue
+                if pattern[j] == "/":
+                    out.append("(?:.*/)?")
+                    i = j + 1
+                    continue
+            out.append("[^/]*")
+            i = j
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pattern.find("]", i + 2)
+            if j < 0:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1 : j]
+            negate = body[:1] in ("!", "^")
+            if negate:
+                body = body[1:]
+            body = body.replace("\\", "\\\\")
+            out.append(("[^/" if negate else "[") + body + "]")
+            i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class IgnorePattern(NamedTuple):
+    regex: str
+    negate: bool
+    dir_only: bool
+
+
+def parse_line(line: str) -> IgnorePattern | None:
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    if stripped == "" or stripped.startswith("#"):
+        return None
+    negate = stripped.startswith("!")
+    if negate:
+        stripped = stripped[1:]
+    dir_only = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    anchored = "/" in stripped
+    stripped = stripped.lstrip("/")
+    if stripped == "":
+        return None
+    regex = translate(stripped)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return IgnorePattern(regex, negate, dir_only)
+
+
+class _Group(NamedTuple):
+    matcher: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+class IgnoreRules:
+    """
+    Patterns of the ignore files in one directory. Runs of consecutive patterns
+    with the same kind are compiled into one alternation, so a path is tested
+    against a few regexes instead of one per line; the last matching run wins.
+    """
+
+    __slots__ = ("_groups",)
+
+    def __init__(self, patterns: list[IgnorePattern]) -> None:
+        groups: list[_Group] = []
+        run: list[str] = []
+        for i, p in enumerate(patterns):
+            run.append(f"(?:{p.regex})")
+            nxt = patterns[i + 1] if i + 1 < len(patterns) else None
+            if nxt is None or (nxt.negate, nxt.dir_only) != (p.negate, p.dir_only):
+                flags = re.IGNORECASE if IGNORE_CASE else 0
+                groups.append(_Group(re.compile("|".join(run), flags), p.negate, p.dir_only))
+                run = []
+        groups.reverse()
+        self._groups = groups
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        """True if ignored, False if re-included by `!`, None if no rule applies."""
+        for g in self._groups:
+            if g.dir_only and not is_dir:
+                continue
+            if g.matcher.fullmatch(path):
+                return not g.negate
+        return None
+
+
+def load_rules(dir_path: str, names: tuple[str, ...] = IGNORE_FILES) -> IgnoreRules | None:
+    patterns = []
+    for name in names:
+        try:
+            with open(os.path.join(dir_path, name), encoding="utf-8") as f:
+                for line in f:
+                    p = parse_line(line)
+                    if p is not None:
+                        patterns.append(p)
+        except (OSError, UnicodeDecodeError):
+            continue
+    if len(patterns) < 1:
+        return None
+    return IgnoreRules(patterns)
+
+
+class _Scope(NamedTuple):
+    strip: int  # length of the walk-relative dir prefix to drop
+    prefix: str  # path from the rules' dir down to the walk root
+    rules: IgnoreRules
+
+
+class IgnoreMatcher:
+    """
+    `.gitignore` / `.ignore` rules for a walk under `root`, usable as a walker
+    prune hook. Ignore files are read lazily, once per directory, the first
+    time an entry of that directory is checked; those of the enclosing git
+    work tree above `root` (and its `.git/info/exclude`) apply as well.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._chains: dict[str, tuple[_Scope, ...]] = {}
+
+    def _outer_scopes(self) -> tuple[_Scope, ...]:
+        root = Path(self.root).resolve()
+        top = None
+        for p in (root, *root.parents):
+            if (p / ".git").exists():
+                top = p
+                break
+        if top is None:
+            return ()
+
+        def _prefix(p: Path) -> str:
+            return "" if p == root else root.relative_to(p).as_posix() + "/"
+
+        scopes = []
+        rules = load_rules(str(top / ".git" / "info"), ("exclude",))
+        if rules is not None:
+            scopes.append(_Scope(0, _prefix(top), rules))
+        for p in reversed(root.parents):
+            if len(top.parts) <= len(p.parts):
+                rules = load_rules(str(p))
+                if rules is not None:
+                    scopes.append(_Scope(0, _prefix(p), rules))
+        # deepest first
+        scopes.reverse()
+        return tuple(scopes)
+
+    def _chain(self, rel_dir: str) -> tuple[_Scope, ...]:
+        with self._lock:
+            found = self._chains.get(rel_dir)
+        if found is not None:
+            return found
+        if rel_dir == "":
+            outer = self._outer_scopes()
+        else:
+            outer = self._chain(os.path.dirname(rel_dir))
+        rules = load_rules(os.path.join(self.root, rel_dir) if rel_dir else self.root)
+        if rules is None:
+            chain = outer
+        else:
+            strip = len(rel_dir) + 1 if rel_dir else 0
+            chain = (_Scope(strip, "", rules), *outer)
+        with self._lock:
+            self._chains[rel_dir] = chain
+        return chain
+
+    def is_ignored(self, relpath: str, is_dir: bool) -> bool:
+        for scope in self._chain(os.path.dirname(relpath)):
+            path = scope.prefix + relpath[scope.strip :].replace(os.sep, "/")
+            found = scope.rules.match(path, is_dir)
+            if found is not None:
+                return found
+        return False
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+
+from .common import CACHE_DIR
+
+
+class _Row:
+    __slots__ = ("size", "mtime_ns", "partial", "full", "full_limit", "dirty")
+
+    def __init__(
+        self,
+        size: int,
+        mtime_ns: int,
+        partial: str | None = None,
+        full: str | None = None,
+        full_limit: int = 0,
+        dirty: bool = False,
+    ) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.partial = partial
+        self.full = full
+        self.full_limit = full_limit
+        self.dirty = dirty
+
+
+class HashCache:
+    """
+    On-disk content-hash cache keyed by (normalized path, size, mtime).
+    Rows are read lazily and written back in one transaction by `flush()`;
+    the least recently used rows are evicted beyond `max_rows`.
+    """
+
+    max_rows = 300000
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False
+        self._rows: dict[str, _Row | None] = {}
+        self._used: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is None and not self._broken:
+            try:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS filehash ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+                    " partial TEXT, full TEXT, full_limit INTEGER, used REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS filehash_used ON filehash(used)")
+                self._conn = conn
+            except sqlite3.Error as e:
+                self._disable(e)
+        return self._conn
+
+    def _disable(self, e: sqlite3.Error) -> None:
+        # e.g. "database is locked" by another cfiler: run on without the cache
+        print(f"hash cache disabled: {e}")
+        self._broken = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+    @staticmethod
+    def to_key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    def _current(self, key: str, st: os.stat_result) -> _Row:
+        """Cached row for `key` if it still matches `st`, else a fresh empty one."""
+        if key not in self._rows:
+            row = None
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    found = conn.execute(
+                        "SELECT size, mtime_ns, partial, full, full_limit"
+                        " FROM filehash WHERE path = ?",
+                        (key,),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    self._disable(e)
+                    found = None
+                if found is not None:
+                    row = _Row(*found)
+            self._rows[key] = row
+        row = self._rows[key]
+        if row is None or row.size != st.st_size or row.mtime_ns != st.st_mtime_ns:
+            row = _Row(st.st_size, st.st_mtime_ns)
+            self._rows[key] = row
+        return row
+
+    def get(self, path: str, full_limit: int | None = None) -> str | None:
+        """
+        Partial digest when `full_limit` is None, else the full digest computed
+        with the same limit (0 means whole file).
+        """
+        st = os.stat(path)
+        key = self.to_key(path)
+        with self._lock:
+            row = self._current(key, st)
+            if full_limit is None:
+                digest = row.partial
+            else:
+                digest = row.full if row.full_limit == full_limit else None
+            if digest is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._used.add(key)
+            return digest
+
+    def put(self, path: str, digest: str, full_limit: int | None = None) -> None:
+        st = os.stat(path)
+        key = self.to_key(path)
+        with self._lock:
+            row = self._current(key, st)
+            if full_limit is None:
+                row.partial = digest
+            else:
+                row.full = digest
+                row.full_limit = full_limit
+            row.dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                self._rows.clear()
+                self._used.clear()
+                return
+            now = time.time()
+            dirty = [(k, r) for k, r in self._rows.items() if r is not None and r.dirty]
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO filehash"
+                        " (path, size, mtime_ns, partial, full, full_limit, used)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (
+                                k,
+                                r.size,
+                                r.mtime_ns,
+                                r.partial,
+                                r.full,
+                                r.full_limit,
+                                now,
+                            )
+                            for k, r in dirty
+                        ],
+                    )
+                    conn.executemany(
+                        "UPDATE filehash SET used = ? WHERE path = ?",
+                        [(now, k) for k in self._used],
+                    )
+                    (count,) = conn.execute("SELECT COUNT(*) FROM filehash").fetchone()
+                    if self.max_rows < count:
+                        conn.execute(
+                            "DELETE FROM filehash WHERE path IN"
+                            " (SELECT path FROM filehash ORDER BY used LIMIT ?)",
+                            (count - self.max_rows,),
+                        )
+            except sqlite3.Error as e:
+                print(f"hash cache flush failed: {e}")
+            self._rows.clear()
+            self._used.clear()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> str:
+        return f"hash cache: {self.hits} hit / {self.misses} miss"
+
+
+HASH_CACHE = HashCache(os.path.join(CACHE_DIR, "filehash.sqlite3"))
@@ -1,6 +1,11 @@
+from __future__ import annotations
+
 import configparser
+import os
 import shutil
 import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
 import ckit  # type: ignore
@@ -10,6 +15,8 @@ from .common import stringify
 
 INI_SECTION = "IMAGE_MAGICK_CONFIG"
 INI_OPTION_NAME = "ext"
+INI_OPTION_WORKERS = "workers"
+MAX_BATCH = 16
 
 
 def setup(_window) -> None:
@@ -25,6 +32,41 @@ def setup(_window) -> None:
         pass
 
 
+def get_workers() -> int:
+    try:
+        return max(1, window.ini.getint(INI_SECTION, INI_OPTION_WORKERS))
+    except Exception:  # noqa: BLE001
+        return max(1, (os.cpu_count() or 2) - 1)
+
+
+def run_magick(cmd: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd,
+        capture_output=True,
+        encoding="utf-8",
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        check=False,
+    )
+
+
+def convert_batch(imagemagick: str, paths: list[str], ext: str) -> list[tuple[str, str]]:
+    """
+    Convert `paths` next to themselves as (path, error) pairs, error "" on success.
+    Several files go through one `magick mogrify` call; if that fails, they are
+    retried one by one so each error lands on its own file.
+    """
+    if 1 < len(paths):
+        proc = run_magick([imagemagick, "mogrify", "-format", ext[1:], *paths])
+        if proc.returncode == 0:
+            return [(path, "") for path in paths]
+    results = []
+    for path in paths:
+        p = Path(path)
+        proc = run_magick([imagemagick, path, str(p.with_name(p.stem + ext))])
+        results.append((path, proc.stderr if proc.returncode != 0 else ""))
+    return results
+
+
 def change_image_type() -> None:
     exe_name = "magick.exe"
     imagemagick = shutil.which(exe_name)
@@ -59,33 +101,56 @@ def change_image_type() -> None:
         msg += "s"
     msg += f" to {ext}:\n"
 
+    workers = get_workers()
+    batch_size = max(1, min(MAX_BATCH, num // (workers * 4)))
+    batches = [targets[i : i + batch_size] for i in range(0, num, batch_size)]
+
     def _convert(job_item: ckit.JobItem) -> None:
         job_item.converted_names = []
+        job_item.note = ""
 
         kiritori.draw_header(msg)
-        for i, path in enumerate(targets, start=1):
-            p = Path(path)
-            new_path = p.with_name(p.stem + ext)
-            cmd = [imagemagick, path, str(new_path)]
-            proc = subprocess.run(
-                cmd,
-                capture_output=True,
-                encoding="utf-8",
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                check=False,
-            )
-            if proc.returncode != 0:
-                print(proc.stderr)
-            else:
-                print(f"[{i:02}/{num:02}]{new_path.name}")
-                job_item.converted_names.append(p.name)
+        started = time.perf_counter()
+        done_bytes = 0
+        count = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            queue = iter(batches)
+            running: set[Future] = set()
+            while True:
+                while len(running) < workers and not job_item.isCanceled():
+                    batch = next(queue, None)
+                    if batch is None:
+                        break
+                    running.add(pool.submit(convert_batch, imagemagick, batch, ext))
+                if len(running) < 1:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for path, error in future.result():
+                        count += 1
+                        if error:
+                            print(error)
+                            continue
+                        p = Path(path)
+                        print(f"[{count:02}/{num:02}]{p.stem + ext}")
+                        job_item.converted_names.append(p.name)
+                        try:
+                            done_bytes += p.stat().st_size
+                        except OSError:
+                            pass
+        if job_item.isCanceled():
+            print("Canceled.")
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        converted = len(job_item.converted_names)
+        fps = converted / elapsed
+        mbps = done_bytes / elapsed / (1024 * 1024)
+        job_item.note = f"{converted} files, {fps:.1f} files/s, {mbps:.1f} MB/s"
 
     def _finish(job_item: ckit.JobItem) -> None:
         names = job_item.converted_names
-        for name in names:
-            pane.unSelectByName(name)
+        pane.unSelectByNames(names)
         if 0 < len(names):
-            kiritori.draw_footer()
+            kiritori.draw_footer(job_item.note)
 
     job = ckit.JobItem(_convert, _finish)
     window.taskEnqueue(job, create_new_queue=False)
@@ -5,6 +5,7 @@ from pathlib import Path
 import ckit  # type:ignore
 
 from . import cpane, kiritori, listwindow
+from .candidate_filter import PrefixFilter
 from .common import get_now, shell_exec, smart_check_path, stringify
 from .rename import affix_handler
 
@@ -89,7 +90,7 @@ def duplicate_with_new_stem() -> None:
         result = result + src_path.suffix
     new_path = src_path.with_name(result)
 
-    if smart_check_path(new_path):
+    if smart_check_path(new_path, use_cache=False):
         kiritori.log("Canceled. (Same item exists)")
         return
 
@@ -134,7 +135,7 @@ def duplicate_with_new_extension() -> None:
 
     new_path = src_path.with_name(result)
 
-    if smart_check_path(new_path):
+    if smart_check_path(new_path, use_cache=False):
         kiritori.log("Canceled. (Same item exists)")
         return
 
@@ -172,19 +173,11 @@ def smart_copy_to_dir(remove_origin: bool) -> None:
     if obs_name not in dests:
         dests.append(obs_name)
 
-    def _listup_dests(
-        update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
-    ) -> tuple:
-        found = [
-            dest for dest in dests if dest.lower().startswith(update_info.text.lower())
-        ]
-        return found, 0
-
     placeholder = "" if len(pane.dirs) != 1 else pane.dirs[0].getName()
     result, mod = window.commandLine(
         prompt,
         text=placeholder,
-        candidate_handler=_listup_dests,
+        candidate_handler=PrefixFilter(dests).handler(),
         return_modkey=True,
     )
 
@@ -193,7 +186,7 @@ def smart_copy_to_dir(remove_origin: bool) -> None:
         return
 
     dir_path = os.path.join(pane.currentPath, result)
-    if not smart_check_path(dir_path):
+    if not smart_check_path(dir_path, use_cache=False):
         pane.mkdir(result)
     pane.copyToChild(result, items, remove_origin)
     if mod == ckit.MODKEY_SHIFT:
@@ -241,19 +234,11 @@ def touch_new_file() -> None:
     else:
         exts = ["txt", "md", "css", "html"]
 
-        def _listup_exts(
-            update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
-        ) -> tuple:
-            found = [
-                ext for ext in exts if ext.lower().startswith(update_info.text.lower())
-            ]
-            return found, 0
-
         ext = window.commandLine(
             "Extension",
             text=exts[0],
             selection=[0, len(exts[0])],
-            candidate_handler=_listup_exts,
+            candidate_handler=PrefixFilter(exts).handler(),
             auto_complete=True,
         )
 
@@ -265,7 +250,7 @@ def touch_new_file() -> None:
 
     new_name = stem + ext
     new_path = os.path.join(pane.currentPath, new_name)
-    if smart_check_path(new_path):
+    if smart_check_path(new_path, use_cache=False):
         kiritori.log(f"'{stem}' already exists.")
         return
 
@@ -17,8 +17,11 @@ def draw_header(title: str) -> None:
     print(f"{get_timestamp().ljust(window.width(), _sep)}\n\n{title}\n")
 
 
-def draw_footer() -> None:
-    print(f"{get_timestamp().rjust(window.width(), _sep)}\n")
+def draw_footer(note: str = "") -> None:
+    ts = get_timestamp()
+    if note:
+        ts = f" {note} {_sep}{ts}"
+    print(f"{ts.rjust(window.width(), _sep)}\n")
 
 
 def log(s) -> None:
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple
+
+from . import walker
+
+
+class DirRecord(NamedTuple):
+    mtime: float
+    max_mtime: float
+    newest: str  # relpath of the file carrying `max_mtime`, "" if none
+    subdirs: list[str]
+
+
+class LatestIndex:
+    """
+    Newest-file index of one tree, kept as one `DirRecord` per directory:
+    the directory's own mtime and the max mtime of the files directly in it.
+    Records live as long as the index. A repeat query stats each directory and
+    its newest file, and re-lists only directories whose own mtime changed.
+    Editing a file in place does not touch its directory's mtime, so such an
+    edit is seen right away only for the directory's newest file; for the
+    others it shows up when the directory itself next changes.
+    """
+
+    def __init__(self, root: str, ignore_dirnames: Iterable[str] = ()) -> None:
+        self.root = root
+        self.ignores = frozenset(ignore_dirnames) | frozenset(walker.IGNORE_DIRNAMES)
+        self.records: dict[str, DirRecord] = {}
+        self.relisted = 0
+        self._lock = threading.Lock()
+
+    def _list(self, rel_dir: str) -> tuple[list[walker.WalkEntry], list[str]]:
+        _, files, subdirs = walker.list_dir(self.root, rel_dir, self.ignores)
+        with self._lock:
+            self.relisted += 1
+        return files, subdirs
+
+    def _refresh(self, rel_dir: str) -> DirRecord | None:
+        path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        rec = self.records.get(rel_dir)
+        if rec is not None and rec.mtime == mtime:
+            if rec.newest == "":
+                return rec
+            try:
+                newest_mtime = os.stat(os.path.join(self.root, rec.newest)).st_mtime
+            except OSError:
+                newest_mtime = 0.0
+            if newest_mtime == rec.max_mtime:
+                return rec
+            if rec.max_mtime < newest_mtime:
+                # edited in place: still the newest of its directory
+                return rec._replace(max_mtime=newest_mtime)
+        files, subdirs = self._list(rel_dir)
+        if len(files) < 1:
+            return DirRecord(mtime, 0.0, "", subdirs)
+        top = max(files, key=lambda f: f.mtime)
+        return DirRecord(mtime, top.mtime, top.relpath, subdirs)
+
+    def query(
+        self,
+        k: int,
+        workers: int = walker.WALK_WORKERS,
+        is_canceled: walker.CancelCheck | None = None,
+    ) -> list[tuple[float, str]]:
+        """
+        Up to `k` newest files as (mtime, relpath), newest first.
+        Only the directories whose max mtime can still place a file in the
+        top `k` are listed for their other files, so at most `k` of them.
+        """
+        self.relisted = 0
+        records: dict[str, DirRecord] = {}
+        level = [""]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while level:
+                if is_canceled is not None and is_canceled():
+                    return []
+                next_level = []
+                for rel_dir, rec in zip(level, pool.map(self._refresh, level)):
+                    if rec is None:
+                        continue
+                    records[rel_dir] = rec
+                    next_level.extend(rec.subdirs)
+                level = next_level
+        self.records = records
+
+        ranked = sorted(
+            ((rel_dir, rec) for rel_dir, rec in records.items() if rec.newest),
+            key=lambda r: -r[1].max_mtime,
+        )
+        if k == 1:
+            return [(rec.max_mtime, rec.newest) for _, rec in ranked[:1]]
+        found: list[tuple[float, str]] = []
+        for rel_dir, rec in ranked:
+            if k <= len(found) and rec.max_mtime <= found[0][0]:
+                break
+            if is_canceled is not None and is_canceled():
+                return []
+            files, _ = self._list(rel_dir)
+            for f in files:
+                if len(found) < k:
+                    heapq.heappush(found, (f.mtime, f.relpath))
+                elif found[0][0] < f.mtime:
+                    heapq.heapreplace(found, (f.mtime, f.relpath))
+        return sorted(found, reverse=True)
+
+
+_indexes: dict[tuple[str, frozenset[str]], LatestIndex] = {}
+MAX_INDEXES = 8
+
+
+def get_index(root: str, ignore_dirnames: Iterable[str] = ()) -> LatestIndex:
+    key = (os.path.normcase(root), frozenset(ignore_dirnames))
+    index = _indexes.pop(key, None)
+    if index is None:
+        index = LatestIndex(root, ignore_dirnames)
+    _indexes[key] = index
+    while MAX_INDEXES < len(_indexes):
+        _indexes.pop(next(iter(_indexes)))
+    return index
@@ -27,7 +27,7 @@ def make_junction() -> None:
     dest = other_pane.currentPath
     for src_path in active_pane.selectedItemPaths:
         junction_path = Path(dest, Path(src_path).name)
-        if smart_check_path(junction_path):
+        if smart_check_path(junction_path, use_cache=False):
             kiritori.log(f"'{junction_path}' already exists.")
             return
         try:
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+import codecs
+import itertools
 import os
 import shutil
 import subprocess
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator
 
 import cfiler_msgbox  # type: ignore
 import ckit  # type: ignore
 import pyauto  # type: ignore
 
-from . import cpane, kiritori
+from . import cpane, kiritori, walker
 from .common import (
     DESKTOP_PATH,
     get_now,
@@ -19,6 +23,7 @@ from .common import (
     run_ps1,
     shell_exec,
     smart_check_path,
+    stringify,
 )
 
 
@@ -50,7 +55,7 @@ def git_init() -> None:
     pane = cpane.CPane()
     path = pane.currentPath
     git_path = os.path.join(path, ".git")
-    if smart_check_path(git_path):
+    if smart_check_path(git_path, use_cache=False):
         kiritori.log(f"'{git_path}' already exists.")
         return
     shell_exec("git", "init", str(path))
@@ -182,58 +187,190 @@ def starting_position(both_pane: bool = False) -> None:
         cpane.LeftPane().activate()
 
 
-def traverse_file(root: str) -> Iterator[str]:
-
-    def _is_skippable(dir_name: str) -> bool:
-        return dir_name == "node_modules" or dir_name.startswith((".", "__"))
-
-    for dir_path, dir_names, file_names in os.walk(root):
-        dir_names[:] = [d for d in dir_names if not _is_skippable(d)]
-        for f in file_names:
-            yield os.path.join(dir_path, f)
-
-
-def summarize_for_llm(root: Path, targets: list[str]) -> tuple[str, int]:
+def traverse_file(
+    root: str,
+    workers: int = walker.WALK_WORKERS,
+    ordered: bool = True,
+    gitignore: bool = False,
+) -> Iterator[str]:
+
+    def _is_skippable(entry: walker.WalkEntry) -> bool:
+        return entry.is_dir and entry.name.startswith("__")
+
+    for entry in walker.walk(
+        root,
+        True,
+        prune=_is_skippable,
+        workers=workers,
+        ordered=ordered,
+        gitignore=gitignore,
+    ):
+        yield entry.fullpath
+
+
+SNIFF_SIZE = 8192
+SUMMARY_FILE_BYTES = 256 * 1024
+SUMMARY_TOTAL_BYTES = 16 * 1024 * 1024
+SUMMARY_WORKERS = 8
+CHARS_PER_TOKEN = 4
+
+
+def is_binary(head: bytes) -> bool:
+    return b"\x00" in head[:SNIFF_SIZE]
+
+
+def decode_head(data: bytes) -> str:
+    """Decode UTF-8, dropping a character cut in half at the end."""
+    return codecs.getincrementaldecoder("utf-8")().decode(data, final=False)
+
+
+def decode_tail(data: bytes) -> str:
+    """Decode UTF-8, dropping a character cut in half at the start."""
+    i = 0
+    while i < min(len(data), 3) and data[i] & 0xC0 == 0x80:
+        i += 1
+    return data[i:].decode("utf-8")
+
+
+def omission(n: int, unit: str) -> str:
+    return f"\n... ({n} {unit} omitted) ...\n"
+
+
+def read_for_summary(path: str, max_bytes: int, max_tokens: int | None = None) -> str | None:
+    """
+    Text of `path` for a summary, newlines normalized to LF, or None for binary /
+    non-UTF-8 / unreadable files. Files over `max_bytes` (or over `max_tokens`,
+    estimated from length) keep only their head and tail.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(size if size <= max_bytes else max_bytes // 2)
+            if is_binary(head):
+                return None
+            if size <= max_bytes:
+                text = head.decode("utf-8")
+            else:
+                f.seek(size - max_bytes // 2)
+                tail = f.read()
+                text = (
+                    decode_head(head)
+                    + omission(size - len(head) - len(tail), "bytes")
+                    + decode_tail(tail)
+                )
+    except (OSError, UnicodeDecodeError):
+        return None
+    # same universal newlines as `read_text`; the text-mode writer adds CRLF back
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if max_tokens is not None and max_tokens * CHARS_PER_TOKEN < len(text):
+        half = max_tokens * CHARS_PER_TOKEN // 2
+        text = (
+            text[:half]
+            + omission((len(text) - 2 * half) // CHARS_PER_TOKEN, "tokens")
+            + text[-half:]
+        )
+    return text
+
+
+def read_ahead(
+    func: Callable[[str], str | None], paths: list[str], workers: int
+) -> Iterator[str | None]:
+    """`map(func, paths)` on a thread pool, with at most `2 * workers` in flight."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        it = iter(paths)
+        for path in itertools.islice(it, workers * 2):
+            pending.append(pool.submit(func, path))
+        while pending:
+            result = pending.popleft().result()
+            for path in itertools.islice(it, 1):
+                pending.append(pool.submit(func, path))
+            yield result
+
+
+def summarize_for_llm(
+    root: Path,
+    targets: list[str],
+    dest: Path,
+    file_bytes: int = SUMMARY_FILE_BYTES,
+    total_bytes: int = SUMMARY_TOTAL_BYTES,
+    max_tokens: int | None = None,
+    gitignore: bool = False,
+) -> int:
+    """
+    Stream a markdown summary of `targets` into `dest` and return how many files
+    went in. Files are read ahead on a thread pool and written in order; binary
+    files are skipped, and once `total_bytes` is reached the rest are left out.
+    """
     paths = []
     for path in targets:
         if Path(path).is_dir():
-            paths.extend(traverse_file(path))
+            paths.extend(traverse_file(path, gitignore=gitignore))
         else:
             paths.append(path)
 
     codeblock = "```"
-    lines: list[str] = ["## dir tree\n", codeblock]
-    lines.extend(str(Path(p).relative_to(root)) for p in paths)
-    lines.append(codeblock)
-    lines.append("\n## file contents\n")
-
     counter = 0
-    for path in paths:
-        p = Path(path)
-        try:
-            content = p.read_text(encoding="utf-8")
+    written = 0
+    with open(dest, "w", encoding="utf-8") as f:
+        f.write(f"## dir tree\n\n{codeblock}\n")
+        for p in paths:
+            f.write(f"{Path(p).relative_to(root)}\n")
+        f.write(f"{codeblock}\n\n## file contents\n\n")
+
+        def _read(path: str) -> str | None:
+            return read_for_summary(path, file_bytes, max_tokens)
+
+        contents = read_ahead(_read, paths, SUMMARY_WORKERS)
+        for i, (path, content) in enumerate(zip(paths, contents)):
+            if content is None:
+                continue
+            p = Path(path)
+            f.write(f"### {p.relative_to(root)}\n\n")
+            f.write(f"{codeblock}{p.name}\n{content}\n{codeblock}\n\n")
             counter += 1
-        except Exception:  # noqa: BLE001, S112
-            continue
-        lines.append(f"### {p.relative_to(root)}\n")
-        lines.append(f"{codeblock}{p.name}")
-        lines.append(content)
-        lines.append(f"{codeblock}\n")
+            written += len(content.encode("utf-8"))
+            if total_bytes <= written:
+                if i + 1 < len(paths):
+                    f.write(f"({len(paths) - i - 1} files omitted: size limit)\n")
+                break
+        contents.close()
 
-    return "\n".join(lines), counter
+    return counter
 
 
-def make_summary_for_llm_on_other_pane() -> None:
+def make_summary_for_llm_on_other_pane(gitignore: bool = False) -> None:
     pane = cpane.CPane()
     root = Path(pane.currentPath)
-    summary, item_count = summarize_for_llm(root, pane.selectedItemPaths)
-    if item_count < 1:
+    targets = pane.selectedItemPaths
+    if len(targets) < 1:
         return
 
-    summary_name = window.commandLine(
-        title="SummaryName (on other pane)", text=f"summary_{root.name}.txt"
+    summary_name = stringify(
+        window.commandLine(title="SummaryName (on other pane)", text=f"summary_{root.name}.txt")
     )
+    if summary_name == "":
+        return
     other_pane = cpane.CPane(False)
-    Path(other_pane.currentPath, summary_name).write_text(summary, encoding="utf-8")
+    dest = Path(other_pane.currentPath, summary_name)
+
+    def _summarize(job_item: ckit.JobItem) -> None:
+        job_item.count = 0
+        job_item.error = None
+        try:
+            job_item.count = summarize_for_llm(root, targets, dest, gitignore=gitignore)
+            if job_item.count < 1:
+                dest.unlink()
+        except OSError as e:
+            job_item.error = e
+
+    def _finish(job_item: ckit.JobItem) -> None:
+        if job_item.error is not None:
+            kiritori.log(job_item.error)
+            return
+        if 0 < job_item.count:
+            other_pane.refresh()
+        kiritori.log(f"Summarized {job_item.count} items.")
 
-    kiritori.log(f"Summarized {item_count} items.")
+    job = ckit.JobItem(_summarize, _finish)
+    window.taskEnqueue(job, create_new_queue=False)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import unicodedata
+from typing import Callable, Iterable, Literal, NamedTuple
+
+Normalization = Literal["NFC", "NFD"]
+
+
+def make_key_func(
+    fold_case: bool = False, normalize: Normalization | None = None
+) -> Callable[[str], str] | None:
+    """Comparison key for names, or None when names are compared as-is."""
+    if normalize is None:
+        if fold_case:
+            return str.casefold
+        return None
+
+    def _key(name: str) -> str:
+        if not unicodedata.is_normalized(normalize, name):
+            name = unicodedata.normalize(normalize, name)
+        if fold_case:
+            return name.casefold()
+        return name
+
+    return _key
+
+
+class NameDiff(NamedTuple):
+    left_common: set[str]
+    right_common: set[str]
+    left_only: set[str]
+    right_only: set[str]
+
+    @property
+    def common(self) -> set[str]:
+        return self.left_common
+
+
+def diff_names(
+    left: Iterable[str],
+    right: Iterable[str],
+    fold_case: bool = False,
+    normalize: Normalization | None = None,
+) -> NameDiff:
+    """
+    Split two name lists in one hashed pass.
+    With folding/normalization, names are reported as spelled on their own side,
+    so each set can be handed straight to `CPane.setSelection`.
+    """
+    key = make_key_func(fold_case, normalize)
+
+    if key is None:
+        ls = set(left)
+        rs = set(right)
+        common = ls & rs
+        return NameDiff(common, common, ls - common, rs - common)
+
+    right_table: dict[str, list[str]] = {}
+    for name in right:
+        right_table.setdefault(key(name), []).append(name)
+
+    left_common: set[str] = set()
+    left_only: set[str] = set()
+    matched_keys: set[str] = set()
+    for name in left:
+        k = key(name)
+        if k in right_table:
+            left_common.add(name)
+            matched_keys.add(k)
+        else:
+            left_only.add(name)
+
+    right_common: set[str] = set()
+    right_only: set[str] = set()
+    for k, names in right_table.items():
+        if k in matched_keys:
+            right_common.update(names)
+        else:
+            right_only.update(names)
+
+    return NameDiff(left_common, right_common, left_only, right_only)
@@ -4,7 +4,12 @@ import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
+from xml.etree import ElementTree
 
 import ckit  # type: ignore
 from cfiler_filelist import item_Default  # type: ignore
@@ -22,7 +27,7 @@ def setup(_window) -> None:
     cpane.setup(window)
 
 
-def read_openxml(path: str) -> str:
+def read_openxml_by_tool(path: str) -> str:
     go_tool = {
         ".docx": "docxr.exe",
         ".xlsx": "xlsxr.exe",
@@ -58,6 +63,100 @@ def read_openxml(path: str) -> str:
         return ""
 
 
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def read_docx_text(path: str) -> str:
+    """
+    Paragraph text of `word/document.xml`, read straight from the zip.
+    Raises on anything that is not a plain docx, so the caller can fall back.
+    """
+    paragraphs = []
+    buf: list[str] = []
+    # `w:tab` also defines tab stops under `w:pPr/w:tabs`; only those in a run are text
+    in_run = 0
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        for event, elem in ElementTree.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == W_NS + "r":
+                    in_run += 1
+                elif 0 < in_run and elem.tag == W_NS + "tab":
+                    buf.append("\t")
+                elif 0 < in_run and elem.tag in (W_NS + "br", W_NS + "cr"):
+                    buf.append("\n")
+                continue
+            if elem.tag == W_NS + "r":
+                in_run -= 1
+            elif elem.tag == W_NS + "t":
+                buf.append(elem.text or "")
+            elif elem.tag == W_NS + "p":
+                paragraphs.append("".join(buf))
+                buf.clear()
+                elem.clear()
+    return "\n".join(paragraphs) + "\n"
+
+
+class OpenXmlReader:
+    """
+    Text of docx/xlsx files, cached by (path, size, mtime).
+    docx is read in-process through `read_docx_text`; xlsx, and any docx that
+    fast path cannot handle, goes to the Go tools on a bounded pool.
+    """
+
+    max_workers = min(4, (os.cpu_count() or 2))
+    max_entries = 256
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._texts: dict[tuple[str, int, int], str] = {}
+
+    def _extract(self, path: str) -> str:
+        if Path(path).suffix == ".docx":
+            try:
+                return read_docx_text(path)
+            except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+                pass
+        return read_openxml_by_tool(path)
+
+    def read(self, path: str) -> str:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            kiritori.log(e)
+            return ""
+        key = (path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            found = self._texts.get(key)
+        if found is not None:
+            return found
+        text = self._extract(path)
+        if text:
+            with self._lock:
+                if self.max_entries <= len(self._texts):
+                    self._texts.pop(next(iter(self._texts)))
+                self._texts[key] = text
+        return text
+
+    def read_all(self, paths: list[str]) -> Iterator[str]:
+        """Texts of `paths` in the same order, extracted concurrently."""
+        if len(paths) < 2:
+            yield from map(self.read, paths)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(self.read, paths)
+
+
+OPENXML_READER = OpenXmlReader()
+
+
+def read_openxml(path: str) -> str:
+    return OPENXML_READER.read(path)
+
+
+def read_openxml_all(paths: list[str]) -> Iterator[str]:
+    return OPENXML_READER.read_all(paths)
+
+
 def preview_content(path: str) -> None:
     _, ext = os.path.splitext(path)
     if ext not in [".docx", ".xlsx"]:
@@ -102,15 +201,13 @@ def docx_to_txt() -> None:
     def _read(_: ckit.JobItem) -> None:
         kiritori.draw_header("Converting docx")
 
-        for i, path in enumerate(paths, start=1):
-            if not path.endswith(".docx"):
-                continue
+        docx_paths = [path for path in paths if path.endswith(".docx")]
+        for i, (path, content) in enumerate(zip(docx_paths, read_openxml_all(docx_paths)), start=1):
             docx_name = Path(path).name
-            print(f"[{i:02}/{len(paths):02}]{docx_name}")
+            print(f"[{i:02}/{len(docx_paths):02}]{docx_name}")
 
             new_path = Path(path).with_suffix(".txt")
-            content = read_openxml(path)
-            if smart_check_path(new_path):
+            if smart_check_path(new_path, use_cache=False):
                 print(f"==> Skipped ({new_path.name} already exists)")
             else:
                 new_path.write_text(content, encoding="utf-8")
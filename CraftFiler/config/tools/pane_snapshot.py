@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import itertools
+from typing import Iterable
+
+from cfiler_filelist import FileList, item_Empty  # type: ignore
+
+from .protocols import ItemDefaultProtocol
+
+_versions = itertools.count(1)
+
+
+def name_to_stem(name: str) -> str:
+    """Same rule as `pathlib.PurePath.stem`, without building a path object."""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[:i]
+    return name
+
+
+def name_to_suffix(name: str) -> str:
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:]
+    return ""
+
+
+def generation_key(file_list: FileList) -> tuple:
+    """
+    Cheap fingerprint of a file-list generation.
+    Refresh, sort and filter all replace or reorder the item objects,
+    so identity of both ends is enough to notice them without a full scan.
+    """
+    n = file_list.numItems()
+    first = file_list.getItem(0) if 0 < n else None
+    last = file_list.getItem(n - 1) if 0 < n else None
+    return (
+        file_list.getLocation(),
+        n,
+        id(first),
+        id(last),
+        id(file_list.getSorter()),
+        id(file_list.getFilter()),
+    )
+
+
+def _selection_of(items: tuple) -> bytes:
+    return bytes(1 if item.selected() else 0 for item in items)
+
+
+class PaneSnapshot:
+    """
+    Immutable, versioned view of one file-list generation.
+    Bitmaps are `bytes` (one byte per item), so they can be shared between versions.
+    """
+
+    __slots__ = (
+        "version",
+        "key",
+        "items",
+        "names",
+        "is_dir",
+        "bookmarked",
+        "selected",
+        "index",
+    )
+
+    def __init__(
+        self,
+        key: tuple,
+        items: tuple,
+        names: tuple,
+        is_dir: bytes,
+        bookmarked: bytes,
+        selected: bytes,
+        index: dict[str, int],
+    ) -> None:
+        self.version = next(_versions)
+        self.key = key
+        self.items = items
+        self.names = names
+        self.is_dir = is_dir
+        self.bookmarked = bookmarked
+        self.selected = selected
+        self.index = index
+
+    @classmethod
+    def build(cls, file_list: FileList) -> PaneSnapshot:
+        key = generation_key(file_list)
+        items = tuple(file_list.getItem(i) for i in range(file_list.numItems()))
+        if len(items) == 1 and isinstance(items[0], item_Empty):
+            items = ()
+        names = tuple(item.getName() for item in items)
+        return cls(
+            key=key,
+            items=items,
+            names=names,
+            is_dir=bytes(1 if item.isdir() else 0 for item in items),
+            bookmarked=bytes(1 if item.bookmark() else 0 for item in items),
+            selected=_selection_of(items),
+            index={name: i for i, name in enumerate(names)},
+        )
+
+    def _with_selected(self, selected: bytes) -> PaneSnapshot:
+        return PaneSnapshot(
+            key=self.key,
+            items=self.items,
+            names=self.names,
+            is_dir=self.is_dir,
+            bookmarked=self.bookmarked,
+            selected=selected,
+            index=self.index,
+        )
+
+    def matches(self, file_list: FileList) -> bool:
+        return self.key == generation_key(file_list)
+
+    def resync_selection(self, indices: Iterable[int] | None = None) -> PaneSnapshot:
+        """Re-read selection state from the items (all of them, or just `indices`)."""
+        if indices is None:
+            selected = _selection_of(self.items)
+        else:
+            buf = bytearray(self.selected)
+            for i in indices:
+                buf[i] = 1 if self.items[i].selected() else 0
+            selected = bytes(buf)
+        if selected == self.selected:
+            return self
+        return self._with_selected(selected)
+
+    @property
+    def count(self) -> int:
+        return len(self.items)
+
+    def indexOf(self, name: str) -> int:
+        return self.index.get(name, -1)
+
+    def _pick(self, bitmap: bytes, flag: int) -> list[ItemDefaultProtocol]:
+        return [item for item, b in zip(self.items, bitmap) if b == flag]
+
+    @property
+    def dirs(self) -> list[ItemDefaultProtocol]:
+        return self._pick(self.is_dir, 1)
+
+    @property
+    def files(self) -> list[ItemDefaultProtocol]:
+        return self._pick(self.is_dir, 0)
+
+    @property
+    def dirCount(self) -> int:
+        return self.is_dir.count(1)
+
+    @property
+    def selectedItems(self) -> list[ItemDefaultProtocol]:
+        return self._pick(self.selected, 1)
+
+    @property
+    def selectedIndices(self) -> list[int]:
+        return [i for i, b in enumerate(self.selected) if b]
+
+    @property
+    def hasSelection(self) -> bool:
+        return 1 in self.selected
+
+    @property
+    def hasBookmark(self) -> bool:
+        return 1 in self.bookmarked
+
+    @property
+    def selectionTop(self) -> int:
+        return self.selected.find(1)
+
+    @property
+    def selectionBottom(self) -> int:
+        return self.selected.rfind(1)
+
+    @property
+    def stems(self) -> list[str]:
+        return [name_to_stem(name) for name in self.names]
+
+    @property
+    def extensions(self) -> list[str]:
+        exts = {}
+        for name, d in zip(self.names, self.is_dir):
+            if d:
+                continue
+            exts[name_to_suffix(name)[1:]] = None
+        return list(exts)
+
+
+_snapshots: dict[int, PaneSnapshot] = {}
+
+
+def take(file_list: FileList) -> PaneSnapshot:
+    """
+    Return the snapshot of the current generation, building it only when the
+    generation changed. Selection is re-read since it changes without a refresh.
+    """
+    k = id(file_list)
+    snap = _snapshots.get(k)
+    if snap is None or not snap.matches(file_list):
+        snap = PaneSnapshot.build(file_list)
+    else:
+        snap = snap.resync_selection()
+    _snapshots[k] = snap
+    return snap
+
+
+def store(file_list: FileList, snap: PaneSnapshot) -> None:
+    _snapshots[id(file_list)] = snap
+
+
+def invalidate(file_list: FileList) -> None:
+    _snapshots.pop(id(file_list), None)
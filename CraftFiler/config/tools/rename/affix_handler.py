@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import bisect
+import heapq
+import itertools
 import os
-from typing import Callable
+import re
+from typing import Callable, Iterable
 
 import ckit  # type: ignore
 
@@ -22,11 +26,134 @@ def to_stem(path: str) -> str:
     return stem
 
 
-def len_ordered(lines: set[str]) -> list[str]:
-    return sorted(set(lines), key=len)
-
-
 SEP = "_"
+TOKEN = re.compile(f"[^{re.escape(SEP)}]*{re.escape(SEP)}|[^{re.escape(SEP)}]+")
+
+
+class _Node:
+    __slots__ = ("children", "tokens", "word", "count", "top")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.tokens: list[str] | None = None
+        self.word: str | None = None
+        self.count = 0
+        self.top: list[tuple[int, int, str]] | None = None
+
+
+class AffixTrie:
+    """
+    Affix candidates with their frequencies, in a trie of `SEP`-terminated tokens
+    ("2024_report_" -> "2024_", "report_"), so there is one node per distinct affix
+    rather than one per character. Each node memoizes the `top_n` best candidates of
+    its subtree (more frequent first, then shorter), so a lookup only walks the
+    typed tokens and merges a few short lists.
+    """
+
+    top_n = 100
+
+    def __init__(self, counts: dict[str, int]) -> None:
+        self._root = _Node()
+        self._found: dict[str, list[tuple[int, int, str]]] = {}
+        for word, count in counts.items():
+            node = self._root
+            for token in TOKEN.findall(word):
+                node = node.children.setdefault(token, _Node())
+            node.word = word
+            node.count += count
+
+    def count(self, word: str) -> int:
+        node = self._root
+        for token in TOKEN.findall(word):
+            node = node.children.get(token)
+            if node is None:
+                return 0
+        return node.count if node.word == word else 0
+
+    def _top(self, node: _Node) -> list[tuple[int, int, str]]:
+        if node.top is None:
+            own = [] if node.word is None else [(-node.count, len(node.word), node.word)]
+            node.top = heapq.nsmallest(
+                self.top_n,
+                itertools.chain(own, *(self._top(c) for c in node.children.values())),
+            )
+        return node.top
+
+    def _matching_children(self, node: _Node, partial: str) -> list[_Node]:
+        if node.tokens is None:
+            node.tokens = sorted(node.children)
+        i = bisect.bisect_left(node.tokens, partial)
+        found = []
+        while i < len(node.tokens) and node.tokens[i].startswith(partial):
+            found.append(node.children[node.tokens[i]])
+            i += 1
+        return found
+
+    def _ranked(self, text: str) -> list[tuple[int, int, str]]:
+        tokens = TOKEN.findall(text)
+        partial = "" if text.endswith(SEP) or len(tokens) < 1 else tokens.pop()
+        node = self._root
+        for token in tokens:
+            node = node.children.get(token)
+            if node is None:
+                return []
+        if partial == "":
+            return self._top(node)
+        return heapq.nsmallest(
+            self.top_n,
+            itertools.chain(*(self._top(c) for c in self._matching_children(node, partial))),
+        )
+
+    def lookup(self, text: str, extras: Iterable[str] = ()) -> list[str]:
+        """
+        Candidates starting with `text`, best first. `extras` are ranked in as if
+        seen at least once, without touching the shared trie.
+        """
+        ranked = self._found.get(text)
+        if ranked is None:
+            ranked = self._ranked(text)
+            if MAX_FOUND < len(self._found):
+                self._found.clear()
+            self._found[text] = ranked
+        extras = [e for e in extras if e.startswith(text)]
+        if 0 < len(extras):
+            words = {w for _, _, w in ranked}
+            ranked = sorted(
+                ranked
+                + [(-max(1, self.count(e)), len(e), e) for e in set(extras) if e not in words]
+            )[: self.top_n]
+        return [w for _, _, w in ranked]
+
+
+MAX_FOUND = 256
+MAX_TRIES = 4
+
+_tries: dict[tuple, tuple[AffixTrie, AffixTrie]] = {}
+
+
+def get_affix_tries(pane: cpane.CPane) -> tuple[AffixTrie, AffixTrie]:
+    """
+    (prefix trie, suffix trie) of the stems in `pane`, built once per file-list
+    generation and shared by every prompt opened on it.
+    """
+    key = pane.snapshot.key
+    tries = _tries.pop(key, None)
+    if tries is None:
+        prefixes: dict[str, int] = {}
+        suffixes: dict[str, int] = {}
+        for name in pane.names:
+            stem, _ = os.path.splitext(name)
+            for i, c in enumerate(stem):
+                if 0 < i and c == SEP:
+                    p = stem[: i + 1]
+                    prefixes[p] = prefixes.get(p, 0) + 1
+                    s = stem[i:]
+                    suffixes[s] = suffixes.get(s, 0) + 1
+        tries = (AffixTrie(prefixes), AffixTrie(suffixes))
+    _tries[key] = tries
+    while MAX_TRIES < len(_tries):
+        _tries.pop(next(iter(_tries)))
+    return tries
 
 
 def get_selected_item_timestamp(pane: cpane.CPane) -> str:
@@ -39,84 +166,75 @@ def get_selected_stems(pane: cpane.CPane) -> list[str]:
     return sorted([to_stem(p) for p in pane.selectedItemPaths])
 
 
-def get_prefix_candidates(pane: cpane.CPane) -> set[str]:
-    candidates = set()
-    for path in pane.paths:
-        stem = to_stem(path)
-        for i, c in enumerate(stem):
-            if 0 < i and c == SEP:
-                candidates.add(stem[: i + 1])
-    return candidates
+def get_prefix_candidates(pane: cpane.CPane) -> AffixTrie:
+    return get_affix_tries(pane)[0]
 
 
-def filter_prefixes(candidates: set[str], user_input: str) -> list[str]:
-    return len_ordered({c for c in candidates if c.startswith(user_input)})
+def filter_prefixes(
+    candidates: AffixTrie, user_input: str, extras: Iterable[str] = ()
+) -> list[str]:
+    return candidates.lookup(user_input, extras)
 
 
-def invoke_prefix_handler() -> Callable[
-    [ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]
-]:
+def invoke_prefix_handler() -> (
+    Callable[[ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]]
+):
     pane = cpane.CPane()
     selected = get_selected_stems(pane) + get_selected_stems(cpane.CPane(False))
     candidates = get_prefix_candidates(pane)
-    candidates.add(f"{get_selected_item_timestamp(pane)}_")
+    extras = [f"{get_selected_item_timestamp(pane)}_"]
 
     def _handler(
         update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
     ) -> tuple[list[str], int]:
-        matched = filter_prefixes(candidates, update_info.text)
+        matched = filter_prefixes(candidates, update_info.text, extras)
         return selected + matched, 0
 
     return _handler
 
 
-def get_suffix_candidates(pane: cpane.CPane) -> set[str]:
-    candidates = set()
-    candidates.add(f"_{get_now().strftime('%Y%m%d')}")
-    for path in pane.paths:
-        stem = to_stem(path)
-        for i, c in enumerate(stem):
-            if 0 < i and c == SEP:
-                candidates.add(stem[i:])
-    return candidates
+def get_suffix_candidates(pane: cpane.CPane) -> AffixTrie:
+    return get_affix_tries(pane)[1]
+
 
+def filter_suffixes(
+    candidates: AffixTrie, user_input: str, extras: Iterable[str] = ()
+) -> list[str]:
+    extras = [f"_{get_now().strftime('%Y%m%d')}", *extras]
 
-def filter_suffixes(candidates: set[str], user_input: str) -> list[str]:
     if SEP not in user_input:
-        return len_ordered({user_input + c for c in candidates})
+        return [user_input + c for c in candidates.lookup("", extras)]
 
     if user_input.endswith(SEP):
-        return len_ordered({user_input + c[1:] for c in candidates})
+        return [user_input + c[1:] for c in candidates.lookup("", extras)]
 
-    found = set()
     sep_pos = user_input.find(SEP)
     after_first_sep = user_input[sep_pos:]
-    for c in candidates:
-        if c.startswith(after_first_sep):
-            found.add(user_input + c[len(after_first_sep) :])
-    return len_ordered(found)
+    return [
+        user_input + c[len(after_first_sep) :] for c in candidates.lookup(after_first_sep, extras)
+    ]
 
 
-def invoke_suffix_handler() -> Callable[
-    [ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]
-]:
+def invoke_suffix_handler() -> (
+    Callable[[ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]]
+):
     pane = cpane.CPane()
     selected = get_selected_stems(pane) + get_selected_stems(cpane.CPane(False))
     candidates = get_suffix_candidates(pane)
-    candidates.add(f"_{get_selected_item_timestamp(pane)}")
+    extras = [f"_{get_selected_item_timestamp(pane)}"]
 
     def _handler(
         update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
     ) -> tuple[list[str], int]:
-        matched = filter_suffixes(candidates, update_info.text)
+        matched = filter_suffixes(candidates, update_info.text, extras)
         return selected + matched, 0
 
     return _handler
 
 
-def invoke_name_candidate_handler() -> Callable[
-    [ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]
-]:
+def invoke_name_candidate_handler() -> (
+    Callable[[ckit.ckit_widget.EditWidget.UpdateInfo], tuple[list[str], int]]
+):
     pane = cpane.CPane()
     prefix_candidates = get_prefix_candidates(pane)
     suffix_candidates = get_suffix_candidates(pane)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import struct
+
+HEADER_SIZE = 64 * 1024
+
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+TYPE_ASCII = 2
+
+
+def _tiff_datetime_original(buf: bytes, base: int) -> str | None:
+    """`DateTimeOriginal` of the TIFF structure starting at `buf[base:]`."""
+    order = buf[base : base + 2]
+    if order == b"II":
+        end = "<"
+    elif order == b"MM":
+        end = ">"
+    else:
+        return None
+
+    def _u16(pos: int) -> int:
+        return struct.unpack_from(end + "H", buf, base + pos)[0]
+
+    def _u32(pos: int) -> int:
+        return struct.unpack_from(end + "I", buf, base + pos)[0]
+
+    def _find(ifd: int, tag: int) -> tuple[int, int, int] | None:
+        n = _u16(ifd)
+        for i in range(n):
+            entry = ifd + 2 + i * 12
+            if _u16(entry) == tag:
+                return _u16(entry + 2), _u32(entry + 4), entry + 8
+        return None
+
+    try:
+        if _u16(2) != 42:
+            return None
+        exif_ptr = _find(_u32(4), TAG_EXIF_IFD)
+        if exif_ptr is None:
+            return None
+        found = _find(_u32(exif_ptr[2]), TAG_DATETIME_ORIGINAL)
+        if found is None:
+            return None
+        typ, count, value_pos = found
+        if typ != TYPE_ASCII or count < 19:
+            return None
+        start = base + _u32(value_pos)
+        raw = buf[start : start + 19]
+        if len(raw) < 19:
+            return None
+        return raw.decode("ascii")
+    except (struct.error, UnicodeDecodeError):
+        return None
+
+
+def _jpeg_exif_base(buf: bytes, pos: int = 0) -> int:
+    """Offset of the TIFF header inside the APP1 Exif segment, or -1."""
+    if buf[pos : pos + 2] != b"\xff\xd8":
+        return -1
+    pos += 2
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            return -1
+        marker = buf[pos + 1]
+        if marker in (0xD9, 0xDA):  # end of image / start of scan
+            return -1
+        (length,) = struct.unpack_from(">H", buf, pos + 2)
+        if marker == 0xE1 and buf[pos + 4 : pos + 10] == b"Exif\x00\x00":
+            return pos + 10
+        pos += 2 + length
+    return -1
+
+
+def _webp_exif_base(buf: bytes) -> int:
+    pos = 12
+    while pos + 8 <= len(buf):
+        fourcc = buf[pos : pos + 4]
+        (size,) = struct.unpack_from("<I", buf, pos + 4)
+        if fourcc == b"EXIF":
+            data = pos + 8
+            if buf[data : data + 6] == b"Exif\x00\x00":
+                data += 6
+            return data
+        pos += 8 + size + (size & 1)
+    return -1
+
+
+def read_datetime_original(path: str) -> str | None:
+    """
+    `DateTimeOriginal` ("YYYY:MM:DD HH:MM:SS") read from the file header alone.
+    Handles JPEG, WebP, TIFF-based raw files (CR2, NEF, ARW, DNG, ...) and RAF.
+    Returns None when the tag is not within the header, so the caller can fall
+    back to a full decoder.
+    """
+    with open(path, "rb") as f:
+        buf = f.read(HEADER_SIZE)
+        if buf.startswith(b"FUJIFILMCCD-RAW") and 88 <= len(buf):
+            # RAF keeps its EXIF in an embedded JPEG whose offset is at 84
+            (jpeg_offset,) = struct.unpack_from(">I", buf, 84)
+            f.seek(jpeg_offset)
+            buf = f.read(HEADER_SIZE)
+    if buf.startswith(b"\xff\xd8"):
+        base = _jpeg_exif_base(buf)
+    elif buf.startswith((b"II*\x00", b"MM\x00*")):
+        base = 0
+    elif buf[:4] == b"RIFF" and buf[8:12] == b"WEBP":
+        base = _webp_exif_base(buf)
+    else:
+        return None
+    if base < 0:
+        return None
+    return _tiff_datetime_original(buf, base)
@@ -3,9 +3,8 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
-import ckit  # type: ignore
-
 from .. import cpane
+from ..candidate_filter import PrefixFilter
 from . import renamer
 
 
@@ -39,20 +38,11 @@ def execute() -> None:
             exts.append(ext)
     exts = sorted(set(exts))
 
-    def _listup_exts(
-        update_info: ckit.ckit_widget.EditWidget.UpdateInfo,
-    ) -> tuple:
-        found = []
-        for ext in exts:
-            if ext.lower().startswith(update_info.text.lower()):
-                found.append(ext)
-        return found, 0
-
     new_ext = window.commandLine(
         title="NewExt",
         text=placeholder,
         selection=[1, len(placeholder)],
-        candidate_handler=_listup_exts,
+        candidate_handler=PrefixFilter(exts).handler(),
     )
 
     if new_ext is None:
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import ctypes
+import json
+import msvcrt
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+from ..common import CACHE_DIR
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+ERROR_ACCESS_DENIED = 5
+
+
+def process_alive(pid: int) -> bool:
+    """
+    Whether `pid` names a running process. A reused PID reads as alive, which
+    only postpones recovery until that process exits.
+    """
+    if pid < 1:
+        return False
+    kernel32 = getattr(ctypes, "WinDLL")("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class JournalPlan(NamedTuple):
+    id: str
+    steps: list[tuple[str, str]]
+    done: int
+    status: str
+    undoes: str | None
+    pid: int
+
+    @property
+    def is_open(self) -> bool:
+        return self.status == "open"
+
+
+class RenameJournal:
+    """
+    Append-only JSON-lines log of rename plans.
+    A plan and all of its steps are written and fsynced before the first rename;
+    completions are buffered and fsynced every `sync_every` steps or `sync_sec`
+    seconds, since the file system itself tells how far an unsynced plan got.
+    Several cfiler processes share the file: each write, compaction and read
+    holds a lock on a sidecar `.lock` file, and each plan records its owner's
+    PID so that no process recovers a plan that is still running elsewhere.
+    """
+
+    sync_every = 256
+    sync_sec = 1.0
+    max_bytes = 4 * 1024 * 1024
+    keep_plans = 20
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._buffer: list[str] = []
+        self._synced_at = 0.0
+        self._begun: set[str] = set()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # `LK_LOCK` retries for about 10 seconds, then raises OSError
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def _sync(self) -> None:
+        if self._buffer:
+            with self._file_lock(), open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(self._buffer))
+                f.flush()
+                os.fsync(f.fileno())
+            self._buffer.clear()
+        self._synced_at = time.monotonic()
+
+    def _append(self, record: dict, sync: bool) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if (
+            sync
+            or self.sync_every <= len(self._buffer)
+            or self.sync_sec < time.monotonic() - self._synced_at
+        ):
+            self._sync()
+
+    def begin(self, steps: list[tuple[str, str]], undoes: str | None = None) -> str:
+        plan_id = uuid.uuid4().hex
+        with self._lock:
+            self._begun.add(plan_id)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._file_lock():
+                self._compact()
+            self._append(
+                {"plan": plan_id, "op": "begin", "undoes": undoes, "pid": os.getpid()}, False
+            )
+            for i, (src, dst) in enumerate(steps):
+                self._append(
+                    {"plan": plan_id, "op": "step", "i": i, "src": src, "dst": dst},
+                    False,
+                )
+            self._sync()
+        return plan_id
+
+    def done(self, plan_id: str, i: int) -> None:
+        with self._lock:
+            self._append({"plan": plan_id, "op": "done", "i": i}, False)
+
+    def end(self, plan_id: str, undone: str | None = None) -> None:
+        with self._lock:
+            self._append({"plan": plan_id, "op": "end"}, undone is None)
+            if undone is not None:
+                self._append({"plan": undone, "op": "undone"}, True)
+
+    def fail(self, plan_id: str) -> None:
+        """Close an open plan whose rollback stopped partway, so it is not retried."""
+        with self._lock:
+            self._append({"plan": plan_id, "op": "failed"}, True)
+
+    def _read(self) -> list[dict]:
+        records = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn tail of an interrupted write
+        except OSError:
+            pass
+        return records
+
+    def load(self) -> list[JournalPlan]:
+        try:
+            with self._file_lock():
+                records = self._read()
+        except OSError:
+            # no cache dir yet, or the lock timed out: a torn tail is skipped anyway
+            records = self._read()
+        return self._parse(records)
+
+    @staticmethod
+    def _parse(records: list[dict]) -> list[JournalPlan]:
+        plans: dict[str, dict] = {}
+        for r in records:
+            pid = r.get("plan")
+            op = r.get("op")
+            if op == "begin":
+                plans[pid] = {
+                    "steps": [],
+                    "done": 0,
+                    "status": "open",
+                    "undoes": r.get("undoes"),
+                    "pid": r.get("pid", 0),
+                }
+                continue
+            p = plans.get(pid)
+            if p is None:
+                continue
+            if op == "step":
+                p["steps"].append((r["src"], r["dst"]))
+            elif op == "done":
+                p["done"] = max(p["done"], r["i"] + 1)
+            elif op == "end" and p["status"] == "open":
+                p["status"] = "end"
+            elif op == "failed" and p["status"] == "open":
+                p["status"] = "failed"
+            elif op == "undone":
+                p["status"] = "undone"
+        return [
+            JournalPlan(pid, p["steps"], p["done"], p["status"], p["undoes"], p["pid"])
+            for pid, p in plans.items()
+        ]
+
+    def _compact(self) -> None:
+        # called with the file lock held
+        try:
+            if os.path.getsize(self.path) <= self.max_bytes:
+                return
+        except OSError:
+            return
+        records = self._read()
+        plans = self._parse(records)
+        keep = {p.id for p in plans[-self.keep_plans :]}
+        keep.update(p.id for p in plans if p.is_open)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in records:
+                if r.get("plan") in keep:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def last_undoable(self) -> JournalPlan | None:
+        for p in reversed(self.load()):
+            if p.status == "end" and p.undoes is None and 0 < p.done:
+                return p
+        return None
+
+    def interrupted(self) -> list[JournalPlan]:
+        """
+        Open plans whose owner is gone: this process's own may still be running,
+        and so may those of another live cfiler process.
+        """
+        me = os.getpid()
+        return [
+            p
+            for p in self.load()
+            if p.is_open and p.id not in self._begun and (p.pid == me or not process_alive(p.pid))
+        ]
+
+
+def actual_progress(plan: JournalPlan) -> int:
+    """
+    Number of leading steps that really happened. Completions may not have been
+    synced, so the steps after the last recorded one are checked on disk.
+    """
+    done = plan.done
+    for src, dst in plan.steps[done:]:
+        if os.path.lexists(src) or not os.path.lexists(dst):
+            break
+        done += 1
+    return done
+
+
+def reversed_steps(plan: JournalPlan, done: int) -> list[tuple[str, str]]:
+    return [(dst, src) for src, dst in reversed(plan.steps[:done])]
+
+
+JOURNAL = RenameJournal(os.path.join(CACHE_DIR, "rename_journal.jsonl"))
@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import datetime
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import ckit  # type: ignore
 from PIL import Image as PILImage  # type: ignore
 from PIL.ExifTags import TAGS  # type: ignore
 
 from .. import cpane
 from ..common import TZ_JST
-from . import renamer
+from . import exif, renamer
 
 
 def setup(_window) -> None:
@@ -21,6 +24,17 @@ def setup(_window) -> None:
 
 
 FILLER_NAME = datetime.datetime.fromtimestamp(0, tz=TZ_JST)
+EXIF_FORMAT = "%Y:%m:%d %H:%M:%S"
+EXIF_WORKERS = 8
+
+# filled from the `EXIF_WORKERS` threads
+_timestamps: dict[tuple[str, int, int], datetime.datetime] = {}
+_timestamps_lock = threading.Lock()
+MAX_TIMESTAMPS = 65536
+
+
+def parse_exif_datetime(s: str) -> datetime.datetime:
+    return datetime.datetime.strptime(s, EXIF_FORMAT).replace(tzinfo=TZ_JST)
 
 
 class PhotoFile:
@@ -52,28 +66,58 @@ class PhotoFile:
                 for tag_id, value in exif_data.items():
                     tag = TAGS.get(tag_id, tag_id)
                     if tag == "DateTimeOriginal":
-                        dt = datetime.datetime.strptime(
-                            value, "%Y:%m:%d %H:%M:%S"
-                        ).replace(tzinfo=TZ_JST)
-                        return dt
+                        return parse_exif_datetime(value)
                 return FILLER_NAME
         except Exception as e:  # noqa: BLE001
             print(e)
             return FILLER_NAME
 
-    def get_timestamp(self) -> datetime.datetime:
+    def from_header(self) -> datetime.datetime | None:
+        try:
+            found = exif.read_datetime_original(self.path)
+            if found is not None:
+                return parse_exif_datetime(found)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def from_offset(self, offset: int) -> datetime.datetime:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                bytes_read = f.read(19)
+            return parse_exif_datetime(bytes_read.decode("ascii"))
+        except (OSError, ValueError) as e:
+            print(e)
+            return FILLER_NAME
+
+    def read_timestamp(self) -> datetime.datetime:
+        if self.ext.lower() != ".mp4":
+            found = self.from_header()
+            if found is not None:
+                return found
         offset = self.get_byte_offset()
         if offset < 1:
             if offset == 0:
                 return self.from_exif()
             return FILLER_NAME
-        with open(self.path, "rb") as f:
-            f.seek(offset)
-            bytes_read = f.read(19)
-        decoded = bytes_read.decode("ascii")
-        return datetime.datetime.strptime(decoded, "%Y:%m:%d %H:%M:%S").replace(
-            tzinfo=TZ_JST
-        )
+        return self.from_offset(offset)
+
+    def get_timestamp(self) -> datetime.datetime:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return self.read_timestamp()
+        key = (self.path, st.st_size, st.st_mtime_ns)
+        with _timestamps_lock:
+            found = _timestamps.get(key)
+        if found is None:
+            found = self.read_timestamp()
+            with _timestamps_lock:
+                if MAX_TIMESTAMPS < len(_timestamps):
+                    _timestamps.clear()
+                _timestamps[key] = found
+        return found
 
     def rename(self, fmt: str) -> str:
         ts = self.get_timestamp().strftime(fmt)
@@ -90,14 +134,23 @@ def execute_with_exif() -> None:
     if len(targets) < 1:
         return
 
-    renames: list[renamer.ItemRename] = []
+    paths = [item.getFullpath() for item in targets]
 
-    for item in targets:
-        path = item.getFullpath()
-        new_name = PhotoFile(path).rename("%Y_%m%d_%H%M%S00")
-        renames.append(renamer.ItemRename(Path(path), new_name))
+    def _read(job_item: ckit.JobItem) -> None:
+        with ThreadPoolExecutor(max_workers=EXIF_WORKERS) as pool:
+            job_item.names = list(
+                pool.map(lambda p: PhotoFile(p).rename("%Y_%m%d_%H%M%S00"), paths)
+            )
 
-    renamer.execute(pane, renames)
+    def _rename(job_item: ckit.JobItem) -> None:
+        renames = [
+            renamer.ItemRename(Path(path), new_name)
+            for path, new_name in zip(paths, job_item.names)
+        ]
+        renamer.execute(pane, renames)
+
+    job = ckit.JobItem(_read, _rename)
+    window.taskEnqueue(job, create_new_queue=False)
 
 
 def execute_for_lightroom_photo_from_dropbox() -> None:
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import NamedTuple
+from typing import Callable, NamedTuple
 
+import ckit  # type: ignore
 from cfiler_resultwindow import popResultWindow  # type: ignore
 
 from .. import cpane, kiritori
+from .journal import JOURNAL, actual_progress, reversed_steps
 
 
 def setup(_window) -> None:
@@ -40,28 +43,258 @@ def get_renamable_items(pane: cpane.CPane) -> list:
     return []
 
 
+class RenameStep(NamedTuple):
+    src: Path
+    dst: Path
+    rename: ItemRename | None
+
+
+def to_key(path: Path) -> str:
+    return os.path.normcase(str(path))
+
+
+def temp_path(src: Path, taken: set[str]) -> Path:
+    i = 0
+    while True:
+        tmp = src.with_name(f"{src.name}.renaming{i}")
+        if os.path.normcase(tmp.name) not in taken:
+            taken.add(os.path.normcase(tmp.name))
+            return tmp
+        i += 1
+
+
+def plan_renames(renames: list[ItemRename]) -> tuple[list[RenameStep], list[str]]:
+    """
+    Order `renames` so that no step overwrites anything: each parent directory
+    is listed once, every collision is reported before anything is touched,
+    chains (a->b, b->c) run from their tail and cycles (a->b, b->a) go through
+    a temporary name. Returns (steps, conflicts); steps is empty on conflict.
+    """
+    listings: dict[Path, set[str]] = {}
+    conflicts: list[str] = []
+    pending: dict[str, ItemRename] = {}
+    dst_keys: dict[str, str] = {}
+    seen: set[str] = set()
+    for r in renames:
+        if r.org_path.name == r.new_name:
+            continue
+        parent = r.org_path.parent
+        if parent not in listings:
+            try:
+                listings[parent] = {os.path.normcase(n) for n in os.listdir(parent)}
+            except OSError as e:
+                conflicts.append(str(e))
+                listings[parent] = set()
+        src_key = to_key(r.org_path)
+        dst_key = to_key(r.org_path.with_name(r.new_name))
+        if dst_key in seen:
+            conflicts.append(f"'{r.new_name}' is the target of more than one rename!")
+            continue
+        seen.add(dst_key)
+        pending[src_key] = r
+        dst_keys[src_key] = dst_key
+
+    for src_key, r in pending.items():
+        dst_key = dst_keys[src_key]
+        if dst_key == src_key or dst_key in pending:
+            continue
+        if os.path.normcase(r.new_name) in listings[r.org_path.parent]:
+            conflicts.append(f"'{r.new_name}' already exists!")
+    if 0 < len(conflicts):
+        return [], conflicts
+
+    # every target is unique, so renames form disjoint chains and cycles
+    # `k` has to wait until `blocker[k]` has moved away
+    blocker = {k: d for k, d in dst_keys.items() if d != k and d in pending}
+    blocked = set(blocker.values())
+    steps: list[RenameStep] = []
+    done: set[str] = set()
+
+    def _emit(key: str) -> None:
+        r = pending[key]
+        steps.append(RenameStep(r.org_path, r.org_path.with_name(r.new_name), r))
+
+    for head in pending:
+        if head in blocked:
+            continue
+        chain = [head]
+        while chain[-1] in blocker:
+            chain.append(blocker[chain[-1]])
+        for k in reversed(chain):
+            _emit(k)
+        done.update(chain)
+
+    for start in pending:
+        if start in done:
+            continue
+        cycle = [start]
+        while blocker[cycle[-1]] != start:
+            cycle.append(blocker[cycle[-1]])
+        r = pending[start]
+        tmp = temp_path(r.org_path, listings[r.org_path.parent])
+        steps.append(RenameStep(r.org_path, tmp, None))
+        for k in reversed(cycle[1:]):
+            _emit(k)
+        steps.append(RenameStep(tmp, r.org_path.with_name(r.new_name), r))
+        done.update(cycle)
+
+    return steps, []
+
+
+def run_journaled(
+    pairs: list[tuple[str, str]],
+    is_canceled: Callable[[], bool],
+    on_done: Callable[[int], None] | None = None,
+    undoes: str | None = None,
+) -> int:
+    """
+    Rename each (src, dst) in order under one journal plan and return how many
+    steps were done. With `undoes`, that plan is marked undone once all succeed.
+    """
+    try:
+        plan_id = JOURNAL.begin(pairs, undoes)
+    except OSError as e:
+        print(f"Rename journal unavailable: {e}")
+        return 0
+    done = 0
+    try:
+        for i, (src, dst) in enumerate(pairs):
+            if is_canceled():
+                print("Canceled.")
+                break
+            if os.path.normcase(src) != os.path.normcase(dst) and os.path.lexists(dst):
+                print(f"'{dst}' already exists!")
+                break
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                print(e)
+                break
+            JOURNAL.done(plan_id, i)
+            done = i + 1
+            if on_done is not None:
+                on_done(i)
+    finally:
+        JOURNAL.end(plan_id, undoes if done == len(pairs) else None)
+    return done
+
+
 def execute(pane: cpane.CPane, renames: list[ItemRename]) -> None:
     if len(renames) < 1:
         return
 
+    steps, conflicts = plan_renames(renames)
+    if 0 < len(conflicts):
+        kiritori.log("Canceled:\n" + "\n".join(conflicts))
+        return
+    if len(steps) < 1:
+        return
+
     preview_lines = [r.get_preview() for r in renames]
     preview_lines.append("\nOK? (Enter / Esc)")
     if not popResultWindow(window, "Preview", "\n".join(preview_lines)):
         return
 
-    kiritori.draw_header("Renaming:")
-    for rename in renames:
-        new_path = rename.org_path.with_name(rename.new_name)
-        if new_path.name in [item.name for item in new_path.parent.iterdir()]:
-            print(f"'{rename.new_name}' already exists!")
+    def _rename(job_item: ckit.JobItem) -> None:
+        kiritori.draw_header("Renaming:")
+        job_item.last = None
+        temps: dict[Path, str] = {}
+
+        def _on_done(i: int) -> None:
+            step = steps[i]
+            if step.rename is None:
+                temps[step.dst] = step.src.name
+                return
+            temps.pop(step.src, None)
+            print(step.rename.get_result())
+            job_item.last = step.rename.new_name
+
+        run_journaled(
+            [(str(step.src), str(step.dst)) for step in steps],
+            job_item.isCanceled,
+            _on_done,
+        )
+        for tmp, name in temps.items():
+            print(f"'{name}' is left as '{tmp.name}'.")
+
+    def _finish(job_item: ckit.JobItem) -> None:
+        pane.refresh()
+        if job_item.last is not None:
+            pane.focusByName(job_item.last)
+        kiritori.draw_footer()
+
+    job = ckit.JobItem(_rename, _finish)
+    window.taskEnqueue(job, create_new_queue=False)
+
+
+def undo_last() -> None:
+    plan = JOURNAL.last_undoable()
+    if plan is None:
+        kiritori.log("No rename to undo.")
+        return
+
+    pairs = reversed_steps(plan, plan.done)
+    preview_lines = [
+        f"Undo: {os.path.basename(src)}\n  ==> {os.path.basename(dst)}\n" for src, dst in pairs
+    ]
+    preview_lines.append("\nOK? (Enter / Esc)")
+    if not popResultWindow(window, "Preview", "\n".join(preview_lines)):
+        return
+
+    def _undo(job_item: ckit.JobItem) -> None:
+        kiritori.draw_header("Undoing rename:")
+        done = run_journaled(pairs, job_item.isCanceled, undoes=plan.id)
+        print(f"{done} of {len(pairs)} reverted.")
+
+    def _finish(_) -> None:
+        cpane.CPane().refresh()
+        cpane.CPane(False).refresh()
+        kiritori.draw_footer()
+
+    job = ckit.JobItem(_undo, _finish)
+    window.taskEnqueue(job, create_new_queue=False)
+
+
+_recovered = False
+
+
+def recover_interrupted() -> None:
+    """
+    Roll back rename plans that a crash left half done.
+    Runs once per process: a config reload must not touch a plan still running.
+    """
+    global _recovered
+    if _recovered:
+        return
+    _recovered = True
+    if len(JOURNAL.interrupted()) < 1:
+        return
+
+    def _recover(job_item: ckit.JobItem) -> None:
+        # re-read: a rename queued before this job may have ended meanwhile
+        job_item.plans = JOURNAL.interrupted()
+        if len(job_item.plans) < 1:
             return
-        try:
-            window.subThreadCall(rename.org_path.rename, (str(new_path),))
-            print(rename.get_result())
-            pane.refresh()
-        except Exception as e:  # noqa: BLE001
-            print(e)
-    kiritori.draw_footer()
-
-    last = renames.pop()
-    pane.focusByName(last.new_name)
+        kiritori.draw_header("Rolling back interrupted rename:")
+        # newest first: an interrupted rollback is undone before its own plan
+        for plan in reversed(job_item.plans):
+            pairs = reversed_steps(plan, actual_progress(plan))
+            done = run_journaled(pairs, lambda: False, undoes=plan.id)
+            print(f"{done} of {len(pairs)} reverted.")
+            if done < len(pairs):
+                for src, dst in pairs[done:]:
+                    print(f"  left as is: '{src}' (was '{dst}')")
+                try:
+                    JOURNAL.fail(plan.id)
+                except OSError as e:
+                    print(f"Rename journal unavailable: {e}")
+
+    def _finish(job_item: ckit.JobItem) -> None:
+        if len(job_item.plans) < 1:
+            return
+        cpane.CPane().refresh()
+        cpane.CPane(False).refresh()
+        kiritori.draw_footer()
+
+    job = ckit.JobItem(_recover, _finish)
+    window.taskEnqueue(job, create_new_queue=False)
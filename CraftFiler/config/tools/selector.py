@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import re
 from pathlib import Path
 from typing import Callable
@@ -5,6 +7,7 @@ from typing import Callable
 import ckit  # type: ignore
 
 from . import cpane, listwindow
+from .name_diff import Normalization, diff_names
 from .rename import affix_handler
 
 
@@ -23,62 +26,42 @@ def all_items() -> None:
 
 def to_top() -> None:
     pane = cpane.CPane()
-    if pane.cursor < pane.selectionTop:
-        for i in range(pane.count):
-            if i <= pane.cursor:
-                pane.select(i, False)
+    cur = pane.cursor
+    if cur < pane.selectionTop:
+        pane.setSelection(range(cur + 1), True)
     else:
-        for item in pane.selectedOrAllItems:
-            i = pane.byName(item.getName())
-            if i <= pane.cursor:
-                pane.toggleSelection(i, False)
-    pane.applySelectionHighlight()
+        pane.setSelection([i for i in pane.selectedOrAllIndices if i <= cur], None)
 
 
 def clear_to_top() -> None:
     pane = cpane.CPane()
-    for i in range(pane.count):
-        if i <= pane.cursor:
-            pane.unSelect(i, False)
-    pane.applySelectionHighlight()
+    pane.setSelection(range(pane.cursor + 1), False)
 
 
 def to_bottom() -> None:
     pane = cpane.CPane()
-    if pane.selectionBottom < pane.cursor:
-        for i in range(pane.count):
-            if pane.cursor <= i:
-                pane.select(i, False)
+    cur = pane.cursor
+    if pane.selectionBottom < cur:
+        pane.setSelection(range(cur, pane.count), True)
     else:
-        for item in pane.selectedOrAllItems:
-            i = pane.byName(item.getName())
-            if pane.cursor <= i:
-                pane.toggleSelection(i, False)
-    pane.applySelectionHighlight()
+        pane.setSelection([i for i in pane.selectedOrAllIndices if cur <= i], None)
 
 
 def clear_to_bottom() -> None:
     pane = cpane.CPane()
-    for i in range(pane.count):
-        if pane.cursor < i:
-            pane.unSelect(i, False)
-    pane.applySelectionHighlight()
+    pane.setSelection(range(pane.cursor + 1, pane.count), False)
 
 
 def files() -> None:
     pane = cpane.CPane()
-    for item in pane.selectedOrAllItems:
-        name = item.getName()
-        if not item.isdir():
-            pane.toggleSelection(pane.byName(name))
+    is_dir = pane.snapshot.is_dir
+    pane.setSelection([i for i in pane.selectedOrAllIndices if not is_dir[i]], None)
 
 
 def dirs() -> None:
     pane = cpane.CPane()
-    for item in pane.selectedOrAllItems:
-        name = item.getName()
-        if item.isdir():
-            pane.toggleSelection(pane.byName(name))
+    is_dir = pane.snapshot.is_dir
+    pane.setSelection([i for i in pane.selectedOrAllIndices if is_dir[i]], None)
 
 
 def clear_all() -> None:
@@ -87,11 +70,13 @@ def clear_all() -> None:
 
 def by_selector_func(func: Callable[[str], bool], negative: bool = False) -> None:
     pane = cpane.CPane()
-    for item in pane.selectedOrAllItems:
-        path = item.getFullpath()
+    items = pane.snapshot.items
+    hits = []
+    for i in pane.selectedOrAllIndices:
+        path = items[i].getFullpath()
         if (negative and not func(path)) or (not negative and func(path)):
-            name = item.getName()
-            pane.toggleSelection(pane.byName(name))
+            hits.append(i)
+    pane.setSelection(hits, None)
 
 
 def by_extension(s: str, negative: bool = False) -> None:
@@ -131,26 +116,20 @@ def stem_matches(s: str, case: bool, negative: bool = False) -> None:
     by_selector_func(_checkPath, negative)
 
 
-def from_other_names() -> None:
+def from_other_names(fold_case: bool = False, normalize: Normalization | None = None) -> None:
     pane = cpane.CPane()
-    pane.unSelectAll()
-    active_names = pane.names
     other = cpane.CPane(False)
-    other_names = [item.getName() for item in other.selectedOrAllItems]
-    for name in active_names:
-        if name in other_names:
-            pane.selectByName(name)
+    other_names = other.selectedItemNames if other.hasSelection else other.names
+    diff = diff_names(pane.names, other_names, fold_case, normalize)
+    pane.selectOnly(diff.left_common)
 
 
-def from_active_names() -> None:
+def from_active_names(fold_case: bool = False, normalize: Normalization | None = None) -> None:
     pane = cpane.CPane()
-    active_names = [item.getName() for item in pane.selectedOrAllItems]
+    active_names = pane.selectedItemNames if pane.hasSelection else pane.names
     other = cpane.CPane(False)
-    other.unSelectAll()
-    other_names = other.names
-    for name in other_names:
-        if name in active_names:
-            other.selectByName(name)
+    diff = diff_names(active_names, other.names, fold_case, normalize)
+    other.selectOnly(diff.right_common)
 
 
 def select_same_name() -> None:
@@ -159,43 +138,25 @@ def select_same_name() -> None:
     if len(active_names) < 1:
         active_names = [pane.focusedItem.getName()]
     other = cpane.CPane(False)
-    other.unSelectAll()
-
-    for name in other.names:
-        if name in active_names:
-            other.selectByName(name)
+    other.selectOnly(active_names)
 
 
-def select_name_common() -> None:
+def select_name_common(fold_case: bool = False, normalize: Normalization | None = None) -> None:
     pane = cpane.CPane()
-    pane.unSelectAll()
-    active_names = pane.names
     other = cpane.CPane(False)
-    other.unSelectAll()
-    other_names = other.names
+    diff = diff_names(pane.names, other.names, fold_case, normalize)
 
-    for name in active_names:
-        if name in other_names:
-            pane.selectByName(name)
-    for name in other_names:
-        if name in active_names:
-            other.selectByName(name)
+    pane.selectOnly(diff.left_common)
+    other.selectOnly(diff.right_common)
 
 
-def select_name_unique() -> None:
+def select_name_unique(fold_case: bool = False, normalize: Normalization | None = None) -> None:
     pane = cpane.CPane()
-    pane.unSelectAll()
-    active_names = pane.names
     other = cpane.CPane(False)
-    other.unSelectAll()
-    other_names = other.names
+    diff = diff_names(pane.names, other.names, fold_case, normalize)
 
-    for name in active_names:
-        if name not in other_names:
-            pane.selectByName(name)
-    for name in other_names:
-        if name not in active_names:
-            other.selectByName(name)
+    pane.selectOnly(diff.left_only)
+    other.selectOnly(diff.right_only)
 
 
 def select_stem_startswith() -> None:
@@ -251,10 +212,12 @@ def select_byext() -> None:
 
 def select_empty_dir() -> None:
     pane = cpane.CPane()
+    empties = []
     for d in pane.dirs:
         path = Path(d.getFullpath())
         if not any(path.iterdir()):
-            pane.selectByName(path.name)
+            empties.append(path.name)
+    pane.setSelection(empties)
 
 
 def unselect_panes() -> None:
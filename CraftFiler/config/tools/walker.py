@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+import cfiler_debug  # type: ignore
+from cfiler_filelist import item_Default  # type: ignore
+
+from .gitignore import IgnoreMatcher
+from .protocols import ItemDefaultProtocol
+
+IGNORE_DIRNAMES = ("node_modules",)
+WALK_WORKERS = 8
+
+CancelCheck = Callable[[], bool]
+
+
+class WalkEntry:
+    """Lightweight record of one walked entry. Build an `item_Default` only on demand."""
+
+    __slots__ = ("root", "relpath", "is_dir", "size", "mtime")
+
+    def __init__(self, root: str, relpath: str, is_dir: bool, size: int, mtime: float) -> None:
+        self.root = root
+        self.relpath = relpath
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.relpath)
+
+    @property
+    def fullpath(self) -> str:
+        return os.path.join(self.root, self.relpath)
+
+    def to_item(self) -> ItemDefaultProtocol | None:
+        try:
+            return item_Default(self.root, self.relpath)
+        except Exception:  # noqa: BLE001
+            cfiler_debug.printErrorInfo()
+            return None
+
+
+PruneFunc = Callable[[WalkEntry], bool]
+
+
+def is_ignored_dir(name: str, ignore_dirnames: Iterable[str]) -> bool:
+    return name.startswith(".") or name in ignore_dirnames
+
+
+def is_ignored_file(name: str) -> bool:
+    return name.startswith("~$_")
+
+
+def with_ignore_files(root: str, prune: PruneFunc | None) -> PruneFunc:
+    """`prune` extended with the `.gitignore` / `.ignore` rules found under `root`."""
+    matcher = IgnoreMatcher(root)
+
+    def _prune(entry: WalkEntry) -> bool:
+        if prune is not None and prune(entry):
+            return True
+        return matcher.is_ignored(entry.relpath, entry.is_dir)
+
+    return _prune
+
+
+def list_dir(
+    root: str,
+    rel_dir: str,
+    ignore_dirnames: Iterable[str],
+    prune: PruneFunc | None = None,
+) -> tuple[list[WalkEntry], list[WalkEntry], list[str]]:
+    """
+    One directory listing split into (dirs, files, relpaths to descend into),
+    with ignore rules and `prune` already applied. Sizes and times come from
+    `DirEntry.stat()`, which costs no extra system call on Windows.
+    """
+    dirs: list[WalkEntry] = []
+    files: list[WalkEntry] = []
+    subdirs: list[str] = []
+    try:
+        it = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+    except OSError:
+        return dirs, files, subdirs
+    with it:
+        for de in it:
+            try:
+                is_dir = de.is_dir()
+                if is_dir:
+                    if is_ignored_dir(de.name, ignore_dirnames):
+                        continue
+                elif is_ignored_file(de.name):
+                    continue
+                st = de.stat()
+            except OSError:
+                continue
+            entry = WalkEntry(
+                root,
+                os.path.join(rel_dir, de.name) if rel_dir else de.name,
+                is_dir,
+                0 if is_dir else st.st_size,
+                st.st_mtime,
+            )
+            if prune is not None and prune(entry):
+                continue
+            if is_dir:
+                dirs.append(entry)
+                # symlinked dirs are listed but not descended, as in `os.walk`
+                if not de.is_symlink():
+                    subdirs.append(entry.relpath)
+            else:
+                files.append(entry)
+    return dirs, files, subdirs
+
+
+def walk(
+    root: str,
+    only_file: bool = False,
+    ignore_dirnames: Iterable[str] = (),
+    max_depth: int | None = None,
+    prune: PruneFunc | None = None,
+    workers: int = 1,
+    ordered: bool = True,
+    is_canceled: CancelCheck | None = None,
+    gitignore: bool = False,
+) -> Iterator[WalkEntry]:
+    """
+    Streaming, top-down replacement for `os.walk`.
+    Yields the dirs and then the files of each directory, in `os.walk` order.
+    `max_depth=1` lists `root` only. `prune` returning True drops an entry,
+    and for a directory its whole subtree, before it is listed.
+    With `1 < workers`, directories are listed concurrently (see `_walk_parallel`).
+    `gitignore=True` also prunes what ignore files in the tree exclude.
+    """
+    ignores = frozenset(ignore_dirnames) | frozenset(IGNORE_DIRNAMES)
+    if gitignore:
+        prune = with_ignore_files(root, prune)
+    if 1 < workers:
+        yield from _walk_parallel(
+            root, only_file, ignores, max_depth, prune, workers, ordered, is_canceled
+        )
+        return
+
+    stack: list[tuple[str, int]] = [("", 1)]
+    while stack:
+        if is_canceled is not None and is_canceled():
+            return
+        rel_dir, depth = stack.pop()
+        dirs, files, subdirs = list_dir(root, rel_dir, ignores, prune)
+        if not only_file:
+            yield from dirs
+        yield from files
+        if max_depth is not None and max_depth <= depth:
+            continue
+        for rel in reversed(subdirs):
+            stack.append((rel, depth + 1))
+
+
+class _Listing(NamedTuple):
+    dirs: list[WalkEntry]
+    files: list[WalkEntry]
+    children: list[Future]
+
+
+def _walk_parallel(
+    root: str,
+    only_file: bool,
+    ignores: frozenset[str],
+    max_depth: int | None,
+    prune: PruneFunc | None,
+    workers: int,
+    ordered: bool,
+    is_canceled: CancelCheck | None,
+) -> Iterator[WalkEntry]:
+    """
+    Each task lists one directory and immediately queues its subdirectories,
+    so round trips to a network share overlap.
+    Ordered mode walks the resulting tree of futures depth-first, which yields
+    exactly the sequential order; unordered mode yields listings as they finish.
+    A child may finish before its parent, so unordered mode counts each listing
+    as outstanding when it is submitted, not when its parent is consumed.
+    """
+    stopped = threading.Event()
+    lock = threading.Lock()
+    outstanding = 1
+    done: queue.Queue[_Listing] = queue.Queue()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cfiler_walk")
+
+    def _stopped() -> bool:
+        if is_canceled is not None and is_canceled():
+            stopped.set()
+        return stopped.is_set()
+
+    def _list(rel_dir: str, depth: int) -> _Listing:
+        nonlocal outstanding
+        listing = _Listing([], [], [])
+        try:
+            if not _stopped():
+                dirs, files, subdirs = list_dir(root, rel_dir, ignores, prune)
+                children = []
+                if max_depth is None or depth < max_depth:
+                    for rel in subdirs:
+                        if stopped.is_set():
+                            break
+                        with lock:
+                            outstanding += 1
+                        try:
+                            children.append(pool.submit(_list, rel, depth + 1))
+                        except RuntimeError:  # pool already shut down
+                            with lock:
+                                outstanding -= 1
+                            break
+                listing = _Listing(dirs, files, children)
+        finally:
+            if not ordered:
+                done.put(listing)
+        return listing
+
+    try:
+        first = pool.submit(_list, "", 1)
+        if ordered:
+            stack = [first]
+            while stack:
+                listing = stack.pop().result()
+                if _stopped():
+                    return
+                if not only_file:
+                    yield from listing.dirs
+                yield from listing.files
+                stack.extend(reversed(listing.children))
+        else:
+            while True:
+                with lock:
+                    if outstanding < 1:
+                        break
+                listing = done.get()
+                with lock:
+                    outstanding -= 1
+                if _stopped():
+                    return
+                if not only_file:
+                    yield from listing.dirs
+                yield from listing.files
+    finally:
+        stopped.set()
+        pool.shutdown(wait=False)
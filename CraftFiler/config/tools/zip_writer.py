@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import IO, Callable, NamedTuple
+
+CHUNK_SIZE = 1024 * 1024
+SPOOL_BYTES = 16 * 1024 * 1024
+TICK_SEC = 0.2
+
+# already compressed: deflating them again costs CPU and saves next to nothing
+STORED_EXTS = frozenset(
+    (
+        ".jpg .jpeg .png .gif .webp .heic .avif "
+        ".mp4 .mov .mkv .avi .webm .mp3 .m4a .aac .ogg .flac "
+        ".zip .7z .rar .gz .tgz .bz2 .xz .zst .lzh .cab "
+        ".docx .xlsx .pptx .odt .ods .odp .epub .jar .pdf"
+    ).split()
+)
+
+
+class ZipMember(NamedTuple):
+    path: str
+    arcname: str
+    is_dir: bool
+
+    @property
+    def stored(self) -> bool:
+        return os.path.splitext(self.path)[1].lower() in STORED_EXTS
+
+
+class Deflated(NamedTuple):
+    data: IO[bytes]
+    crc: int
+    size: int
+    compress_size: int
+
+
+ProgressFunc = Callable[[int], None]
+TickFunc = Callable[[], None]
+
+
+def collect_members(root: str, targets: list[str]) -> list[ZipMember]:
+    """Targets and everything under them, named relative to `root`."""
+    members = []
+    for target in targets:
+        members.append(ZipMember(target, os.path.relpath(target, root), os.path.isdir(target)))
+        if not os.path.isdir(target):
+            continue
+        for dirpath, dirnames, filenames in os.walk(target):
+            dirnames.sort()
+            for name in dirnames:
+                path = os.path.join(dirpath, name)
+                members.append(ZipMember(path, os.path.relpath(path, root), True))
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                members.append(ZipMember(path, os.path.relpath(path, root), False))
+    return members
+
+
+def deflate(
+    path: str, level: int, on_progress: ProgressFunc, is_canceled: Callable[[], bool]
+) -> Deflated:
+    """Raw deflate stream of `path`, spilled to a temp file once it gets large."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)  # noqa: SIM115
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = 0
+    size = 0
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                if is_canceled():
+                    break
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                spool.write(compressor.compress(chunk))
+                on_progress(len(chunk))
+        spool.write(compressor.flush())
+    except BaseException:
+        spool.close()
+        raise
+    compress_size = spool.tell()
+    spool.seek(0)
+    return Deflated(spool, crc, size, compress_size)
+
+
+def _add_to_directory(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> None:
+    # members are written to `zf.fp` directly; registering them here lets
+    # `ZipFile.close` emit the central directory (and ZIP64 records) as usual
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+    zf._didModify = True
+
+
+def _write_stored(
+    fp: IO[bytes], zinfo: zipfile.ZipInfo, path: str, on_progress: ProgressFunc
+) -> None:
+    """Copy `path` as is, then rewrite its header once the CRC is known."""
+    zip64 = zipfile.ZIP64_LIMIT < zinfo.file_size
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+    crc = 0
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            fp.write(chunk)
+            on_progress(len(chunk))
+    zinfo.CRC = crc
+    zinfo.file_size = zinfo.compress_size = size
+    end = fp.tell()
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64))
+    fp.seek(end)
+
+
+def _write_deflated(fp: IO[bytes], zinfo: zipfile.ZipInfo, deflated: Deflated) -> None:
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = deflated.crc
+    zinfo.file_size = deflated.size
+    zinfo.compress_size = deflated.compress_size
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader())
+    with deflated.data:
+        shutil.copyfileobj(deflated.data, fp, CHUNK_SIZE)
+
+
+def write_zip(
+    zip_path: str,
+    members: list[ZipMember],
+    level: int,
+    workers: int,
+    is_canceled: Callable[[], bool],
+    on_progress: ProgressFunc,
+    on_tick: TickFunc | None = None,
+) -> bool:
+    """
+    Write `members` to `zip_path` in order. Members to deflate are compressed
+    ahead on `workers` threads (at most `2 * workers` in flight) while this
+    thread appends finished ones; stored members are copied straight through.
+    `on_progress` is called from any of those threads with the bytes read;
+    `on_tick` only from this one, at least every `TICK_SEC` while it waits.
+    Returns False if canceled, leaving a partial file to the caller.
+    """
+    pending: deque[tuple[ZipMember, Future | None]] = deque()
+    it = iter(members)
+
+    def _tick() -> None:
+        if on_tick is not None:
+            on_tick()
+
+    def _on_stored(n: int) -> None:
+        on_progress(n)
+        _tick()
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="cfiler_zip"
+    ) as pool, zipfile.ZipFile(zip_path, "w", allowZip64=True) as zf:
+
+        def _fill() -> None:
+            while len(pending) < workers * 2:
+                m = next(it, None)
+                if m is None:
+                    return
+                future = None
+                if not m.is_dir and not m.stored:
+                    future = pool.submit(deflate, m.path, level, on_progress, is_canceled)
+                pending.append((m, future))
+
+        try:
+            _fill()
+            while pending:
+                if is_canceled():
+                    return False
+                m, future = pending.popleft()
+                _fill()
+                zinfo = zipfile.ZipInfo.from_file(m.path, m.arcname, strict_timestamps=False)
+                zinfo.CRC = zinfo.compress_size = 0
+                if m.is_dir:
+                    zinfo.header_offset = zf.fp.tell()
+                    zf.fp.write(zinfo.FileHeader())
+                elif future is None:
+                    _write_stored(zf.fp, zinfo, m.path, _on_stored)
+                else:
+                    while 0 < len(wait([future], TICK_SEC).not_done):
+                        _tick()
+                    _write_deflated(zf.fp, zinfo, future.result())
+                _add_to_directory(zf, zinfo)
+                _tick()
+        finally:
+            for _, future in pending:
+                if future is not None and not future.cancel():
+                    if future.exception() is None:
+                        future.result().data.close()
+    return True
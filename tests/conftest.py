@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+# `tools` is imported as cfiler loads it, with the config dir on the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "CraftFiler" / "config"))
+
+
+def _placeholder_module(name: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+
+    def __getattr__(attr: str) -> type:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return type(attr, (), {})
+
+    module.__getattr__ = __getattr__  # type: ignore[method-assign]
+    return module
+
+
+# modules that exist only inside the running cfiler; the code under test
+# needs their names at import time, not their behavior
+for _name in ("ckit", "cfiler_debug", "cfiler_filelist"):
+    try:
+        __import__(_name)
+    except ImportError:
+        sys.modules[_name] = _placeholder_module(_name)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from tools.latest_index import LatestIndex
+
+
+def _make_tree(root: Path) -> None:
+    t = 1_600_000_000
+    for a in range(4):
+        for b in range(4):
+            d = root / f"d{a}" / f"e{b}"
+            d.mkdir(parents=True)
+            for c in range(5):
+                f = d / f"f{c}.txt"
+                f.write_text("x")
+                t += 7 * ((a * 31 + b * 17 + c * 13) % 11) + 1
+                os.utime(f, (t, t))
+
+
+def _newest(root: Path, k: int) -> list[tuple[float, str]]:
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            found.append((os.stat(path).st_mtime, os.path.relpath(path, root)))
+    return sorted(found, reverse=True)[:k]
+
+
+def test_query_matches_full_scan(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    index = LatestIndex(str(tmp_path))
+    for k in (1, 3, 10, 200):
+        assert index.query(k) == _newest(tmp_path, k)
+
+
+def test_repeat_query_relists_only_changed_dirs(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    index = LatestIndex(str(tmp_path))
+    index.query(1)
+    assert index.query(1) == _newest(tmp_path, 1)
+    assert index.relisted == 0
+
+    added = tmp_path / "d2" / "e1" / "new.txt"
+    added.write_text("y")
+    assert index.query(1) == [(added.stat().st_mtime, os.path.join("d2", "e1", "new.txt"))]
+    assert index.relisted == 1
+
+
+def test_in_place_edit_of_newest_file_is_seen(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    index = LatestIndex(str(tmp_path))
+    mtime, rel = index.query(1)[0]
+    os.utime(tmp_path / rel, (mtime + 100, mtime + 100))
+    assert index.query(1) == [(mtime + 100, rel)]
+    assert index.relisted == 0
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from tools import walker
+
+
+def _make_tree(root: Path) -> None:
+    # wide and deep enough that children often finish before their parents
+    for a in range(6):
+        for b in range(5):
+            d = root / f"d{a}" / f"e{b}" / "f" / "g"
+            d.mkdir(parents=True)
+            for c in range(3):
+                (d / f"x{c}.txt").write_text("x")
+                (d.parent / f"y{c}.txt").write_text("y")
+        (root / f"d{a}" / "top.txt").write_text("t")
+    (root / "dist" / "d").mkdir(parents=True)
+    (root / "dist" / "d" / "z.txt").write_text("z")
+
+
+def _expected(root: Path) -> list[str]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        for name in dirnames + filenames:
+            found.append(os.path.normpath(os.path.join(rel, name)))
+    return sorted(found)
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parallel_walk_matches_os_walk(tmp_path: Path, ordered: bool) -> None:
+    _make_tree(tmp_path)
+    expected = _expected(tmp_path)
+    for _ in range(20):
+        entries = walker.walk(str(tmp_path), workers=8, ordered=ordered)
+        assert sorted(e.relpath for e in entries) == expected
+
+
+def test_ordered_parallel_walk_keeps_sequential_order(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    sequential = [e.relpath for e in walker.walk(str(tmp_path))]
+    parallel = [e.relpath for e in walker.walk(str(tmp_path), workers=8)]
+    assert parallel == sequential